@@ -1,31 +1,118 @@
-from fastapi import BackgroundTasks, FastAPI, HTTPException, WebSocket
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.websockets import WebSocketState
 from pydantic import BaseModel
-from typing import Optional, List, Dict
-import json
-from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import aiofiles
+import hashlib
+import httpx
+import logging
+import re
+import time
+import orjson
+from datetime import datetime, timezone
+from string import Template
 from google import genai
 from google.genai import types
-import pymongo
-import signal
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from cachetools import TTLCache
 import os
 from dotenv import load_dotenv
 
+# Create MongoDB indexes and the Gemini client on startup. On shutdown, drain the adaptation log
+# and the batched MongoDB writes, then release the connection pool
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await profiles_collection.create_index("user_id", unique=True)
+    gemini_client()  # Build the shared Gemini client before the first event arrives
+    log_writer = asyncio.create_task(adaptation_log_writer())
+    db_writer = asyncio.create_task(mongo_writer())
+    batcher = asyncio.create_task(fusion_batcher())
+    yield
+    fusion_batch_queue.put_nowait(None)
+    await batcher
+    adaptation_log_queue.put_nowait(None)
+    mongo_write_queue.put_nowait(None)
+    await asyncio.gather(log_writer, db_writer)
+    mongo_client.close()
+
 # Initialize FastAPI and Google GenAI client
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 load_dotenv(dotenv_path="gemini.env")
-client = genai.Client(api_key=os.getenv("GOOGLE_GENAI_API_KEY"))
+# Per-event tracing is logged at DEBUG and failures at WARNING, ADAPT_LOG_LEVEL=DEBUG brings back the full fusion trace
+logging.basicConfig(level=os.getenv("ADAPT_LOG_LEVEL", "WARNING"), format="%(message)s")
+logger = logging.getLogger("adaptive_ui")
+# Transport-level timeout as a backstop, per-call deadlines are enforced with asyncio.wait_for.
+# The httpx pool is sized for the concurrent agent fan-out, HTTP/2 multiplexes the calls over warm connections
+GEMINI_HTTP_TIMEOUT_MS = 60_000
+GEMINI_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30)
+
+# One Gemini client per process, created on first use (at startup via lifespan) rather than at import.
+# The API key is read from the environment (gemini.env), never from source
+@lru_cache(maxsize=1)
+def gemini_client() -> genai.Client:
+    api_key = os.getenv("GOOGLE_GENAI_API_KEY")
+    if not api_key:
+        logger.warning("GOOGLE_GENAI_API_KEY is not set, Gemini calls will fail and fall back to mock fusion")
+    return genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(
+            timeout=GEMINI_HTTP_TIMEOUT_MS,
+            client_args={"http2": True, "limits": GEMINI_HTTP_LIMITS},
+            async_client_args={"http2": True, "limits": GEMINI_HTTP_LIMITS},
+        ),
+    )
 
 # Load SIF configuration
-with open('sif_config.json', 'r') as f:
-    sif_config = json.load(f)
+with open('sif_config.json', 'rb') as f:
+    sif_config = orjson.loads(f.read())
+
+# Compile the agent prompts once, str.format would reparse them for every event
+def prompt_template(prompt: str) -> Template:
+    return Template(re.sub(r"\{(\w+)\}", r"${\1}", prompt.replace("$", "$$")))
+
+# Agent specs are frozen at startup, fusion iterates them without per-event config lookups.
+# The prompt tail (allowed actions and focus) doesn't depend on the event, so it's joined once here
+def agent_prompt_tail(agent_config: Dict) -> str:
+    return "\nAllowed actions: " + ", ".join(agent_config["allowed_actions"]) + " with as focus: " + ", ".join(agent_config.get("focus", [])) + "\n"
 
-#MongoDB setup
-mongo_client = pymongo.MongoClient("mongodb://localhost:27017/")
+FUSION_AGENTS = tuple(
+    (agent_name, prompt_template(agent_config["prompt"]), agent_prompt_tail(agent_config), agent_config)
+    for agent_name, agent_config in sif_config["agents"].items()
+    if agent_name != "validator"
+)
+VALIDATOR_CONFIG = sif_config["agents"]["validator"]
+VALIDATOR_TEMPLATE = prompt_template(VALIDATOR_CONFIG["prompt"])
+# With validator_skip enabled the validator only runs when there's something to reconcile, it costs a full extra
+# Gemini round-trip. Skipped results keep their agent tags, so the benchmark classifiers count them as
+# combined_agent_suggestions; off by default
+VALIDATOR_SKIP = sif_config.get("validator_skip", {})
+VALIDATOR_MIN_ADAPTATIONS = VALIDATOR_SKIP.get("min_adaptations", 2) if VALIDATOR_SKIP.get("enabled") else 0
+VALIDATOR_TAIL = "\nAllowed actions: " + ", ".join(VALIDATOR_CONFIG["allowed_actions"]) + "\n"
+BATCH_ALLOWED_ACTIONS = ", ".join(sorted({action for agent_config in sif_config["agents"].values() for action in agent_config["allowed_actions"]}))
+
+#MongoDB setup (async driver, so queries don't block the event loop)
+mongo_client = AsyncIOMotorClient(
+    "mongodb://localhost:27017/",
+    maxPoolSize=100,
+    minPoolSize=10,
+    socketTimeoutMS=2000,
+    connectTimeoutMS=1000,
+    serverSelectionTimeoutMS=2000,
+    retryWrites=True,
+)
 db = mongo_client["adaptive_ui"]
 profiles_collection = db["profiles"]
 logs_collection = db["logs"]
-profiles_collection.create_index("user_id", unique=True)
+
+# Write-through profile cache, saves a Mongo round-trip per event for active users.
+# Profile writes and history pushes update it in place, the TTL only bounds staleness from other workers
+profile_cache = TTLCache(maxsize=10_000, ttl=300)
 
 # CORS for Flutter/SwiftUI frontends
 app.add_middleware(
@@ -48,338 +135,838 @@ class Event(BaseModel):
     metadata: Optional[Dict] = None
 
 # Mock fusion (fallback for failed API calls)
+def miss_tap_adaptation(event: Event) -> Dict:
+    return {
+        "action": "increase_button_size",
+        "target": event.target_element or "all",
+        "value": 1.3,
+        "reason": "Miss-tap detected, increasing target size",
+        "intent": "User had difficulty hitting target"
+    }
+
+def voice_adaptation(event: Event) -> Dict:
+    return {
+        "action": "switch_mode",
+        "target": "all",
+        "mode": "voice",
+        "reason": "Voice input detected, switching to voice mode",
+        "intent": "User prefers voice interaction"
+    }
+
+# Event rules dispatched on event_type: (applies before the profile rules, rule)
+MOCK_EVENT_RULES = {
+    "miss_tap": (True, miss_tap_adaptation),
+    "slider_miss": (True, miss_tap_adaptation),
+    "voice": (False, voice_adaptation),
+}
+
+# Profile rules keyed by accessibility need, the adaptations don't depend on the event
+MOCK_PROFILE_RULES = (
+    ("motor_impaired", {
+        "action": "increase_button_size",
+        "target": "all",
+        "value": 1.5,
+        "reason": "Motor impairment detected, enlarging all elements",
+        "intent": "Improve accessibility for motor difficulties"
+    }),
+    ("visual_impaired", {
+        "action": "increase_contrast",
+        "target": "all",
+        "mode": "high",
+        "reason": "Visual impairment detected, increasing contrast",
+        "intent": "Improve visibility for visual difficulties"
+    }),
+)
+
 def mock_fusion(event: Event, profile: Dict, history: List[Dict]) -> List[Dict]:
     """Basic fallback adaptations for when API calls fail"""
     adaptations = []
-    
+    rule = MOCK_EVENT_RULES.get(event.event_type)
+    if rule is None and "slider_miss" in event.event_type:
+        # Any event type containing slider_miss gets the slider rule, as in the original substring test
+        rule = MOCK_EVENT_RULES["slider_miss"]
+    before_profile, event_rule = rule or (False, None)
+
     # Basic miss-tap handling
-    if event.event_type == "miss_tap" or "slider_miss" in event.event_type:
-        adaptations.append({
-            "action": "increase_button_size",
-            "target": event.target_element or "all",
-            "value": 1.3,
-            "reason": "Miss-tap detected, increasing target size",
-            "intent": "User had difficulty hitting target"
-        })
-    
-    # Basic accessibility support
-    if profile.get("accessibility_needs", {}).get("motor_impaired"):
-        adaptations.append({
-            "action": "increase_button_size",
-            "target": "all",
-            "value": 1.5,
-            "reason": "Motor impairment detected, enlarging all elements",
-            "intent": "Improve accessibility for motor difficulties"
-        })
-
-    # Basic visual impairment support
-    if profile.get("accessibility_needs", {}).get("visual_impaired"):
-        adaptations.append({
-            "action": "increase_contrast",
-            "target": "all",
-            "mode": "high",
-            "reason": "Visual impairment detected, increasing contrast",
-            "intent": "Improve visibility for visual difficulties"
-        })
-    
+    if event_rule and before_profile:
+        adaptations.append(event_rule(event))
+
+    # Basic motor and visual impairment support
+    accessibility_needs = profile.get("accessibility_needs", {})
+    for need, adaptation in MOCK_PROFILE_RULES:
+        if accessibility_needs.get(need):
+            adaptations.append(dict(adaptation))
+
     # Basic voice command handling
-    if event.event_type == "voice":
-        adaptations.append({
-            "action": "switch_mode",
-            "target": "all",
-            "mode": "voice",
-            "reason": "Voice input detected, switching to voice mode",
-            "intent": "User prefers voice interaction"
-        })
-    
+    if event_rule and not before_profile:
+        adaptations.append(event_rule(event))
+
     return adaptations
 
-# Multi-Agent Smart Intent Fusion (MA-SIF)
-def ma_smart_intent_fusion(event: Event, profile: Dict, history: List[Dict]) -> List[Dict]:
-    """Multi-Agent Smart Intent Fusion using Gemini LLMs"""
-    print("---------------------------------")
-    print(f"Processing event: {event.model_dump_json()}")
-
-    event_json = event.model_dump_json()
-    profile_json = json.dumps(profile)
-    history_json = json.dumps(history)
-
-    # Gemini API call
-    def call_gemini_with_timeout(prompt, model, thinking_budget=0, temp=0.2, timeout=15):
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Gemini API call timed out")
-        
-        try:
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(timeout)
-
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_json_schema={
+# Fast path: simple events that mock_fusion already covers skip the LLM pipeline
+def is_simple_event(event: Event, profile: Dict, history: List[Dict]) -> bool:
+    fast_path = sif_config.get("fast_path", {})
+    if not fast_path.get("enabled") or event.event_type not in fast_path.get("event_types", []):
+        return False
+    if len(history) >= fast_path.get("max_history", 3) or any(profile.get("accessibility_needs", {}).values()):
+        return False
+    # Escalate when the recent window mixes input modalities, that's where fusion adds value
+    sources = {event.source} | {past_event.get("source") for past_event in history}
+    return len(sources) < 2
+
+# Any miss_tap / scroll_miss / slider_miss among the latest events
+MISS_EVENT_TYPES = frozenset({"miss_tap", "scroll_miss", "slider_miss"})
+
+def has_recent_miss(history: List[Dict], window: int) -> bool:
+    return any(past_event.get("event_type") in MISS_EVENT_TYPES for past_event in history[-window:])
+
+# Trivial events (a plain tap, no accessibility needs, no recent misses) get no adaptations and skip fusion entirely
+def is_trivial_event(event: Event, profile: Dict, history: List[Dict]) -> bool:
+    fast_path = sif_config.get("fast_path", {})
+    if not fast_path.get("enabled") or event.event_type not in fast_path.get("trivial_event_types", []):
+        return False
+    if any(profile.get("accessibility_needs", {}).values()):
+        return False
+    return not has_recent_miss(history, fast_path.get("trivial_history_window", 5))
+
+# Model tiers: routine events (one input source, no recent misses, no accessibility needs) run the agents with the
+# simple_model_settings overrides, events that need real multimodal fusion keep each agent's own model settings
+def model_tier_override(event: Event, profile: Dict, history: List[Dict]) -> Dict:
+    model_tiers = sif_config.get("model_tiers", {})
+    if not model_tiers.get("enabled") or any(profile.get("accessibility_needs", {}).values()):
+        return {}
+    window = model_tiers.get("history_window", 5)
+    sources = {event.source} | {past_event.get("source") for past_event in history[-window:]}
+    if len(sources) > 1 or has_recent_miss(history, window):
+        return {}
+    return model_tiers.get("simple_model_settings", {})
+
+# Prompt context: only the latest events and the profile preferences are sent to Gemini,
+# interaction_history is left out of the profile since history_json already carries it
+PROMPT_HISTORY_EVENTS = 5
+PROMPT_PROFILE_KEYS = ("accessibility_needs", "input_preferences", "ui_preferences")
+
+PROMPT_HISTORY_KEYS = ("event_type", "source", "target_element", "timestamp", "metadata")
+
+def prompt_profile(profile: Dict) -> Dict:
+    return {key: profile[key] for key in PROMPT_PROFILE_KEYS if key in profile}
+
+def compact_history(history: List[Dict]) -> List[Dict]:
+    """Latest history events with only the fields the agents reason about (no user_id, coordinates or confidence)"""
+    return [{key: past_event[key] for key in PROMPT_HISTORY_KEYS if key in past_event} for past_event in history[-PROMPT_HISTORY_EVENTS:]]
+
+def compact_history_json(history: List[Dict]) -> str:
+    return orjson.dumps(compact_history(history)).decode()
+
+# Fusion result cache, repeated contexts skip the Gemini calls entirely.
+# History enters the key as the recent event types only, timestamps would make every event unique
+fusion_cache = TTLCache(maxsize=10_000, ttl=60)
+fusion_cache_stats = {"hits": 0, "misses": 0}
+FUSION_CACHE_HISTORY_EVENTS = 3
+
+def fusion_cache_key(event_dict: Dict, profile: Dict, history: List[Dict]) -> bytes:
+    """Stable hash of the fusion inputs, ignoring timestamps"""
+    key = hashlib.blake2b(digest_size=16)
+    key.update(orjson.dumps({k: v for k, v in event_dict.items() if k != "timestamp"}, option=orjson.OPT_SORT_KEYS))
+    key.update(orjson.dumps(prompt_profile(profile), option=orjson.OPT_SORT_KEYS, default=str))
+    key.update(orjson.dumps([past_event.get("event_type") for past_event in history[-FUSION_CACHE_HISTORY_EVENTS:]]))
+    return key.digest()
+
+# Adaptations response schema (matches JSON contract)
+ADAPTATIONS_ARRAY_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "action": {
+                "type": "string",
+                "description": "The type of UI adaptation to perform",
+            },
+            "target": {
+                "type": "string",
+                "description": "The UI element or component to apply the adaptation to, 'all' is also an option, if targeting all elements",
+            },
+            "value": {
+                "type": "number",
+                "description": "Numeric multiplier for size changes (e.g., 1.5 for 50% larger)"
+            },
+            "mode": {
+                "type": "string",
+                "description": "Interaction mode or visual mode to switch to (e.g., 'voice', 'gesture', 'high' for contrast)",
+            },
+            "reason": {
+                "type": "string",
+                "description": "Human-readable explanation of why this adaptation was suggested based on the user event and context"
+            },
+            "intent": {
+                "type": "string",
+                "description": "The inferred user intent, what did you think the user's intent was based on the user input event?"
+            },
+        },
+        "required": ["action", "target", "reason", "intent"],
+        "oneOf": [
+            {"required": ["value"]},
+            {"required": ["mode"]}
+        ]
+    }
+}
+
+ADAPTATION_SCHEMA = {
+    "type": "object",
+    "properties": {"adaptations": ADAPTATIONS_ARRAY_SCHEMA},
+    "required": ["adaptations"]
+}
+
+# One adaptations list per fusion agent, for the combined multi-role call
+COMBINED_SCHEMA = {
+    "type": "object",
+    "properties": {f"{agent_name}_adaptations": ADAPTATIONS_ARRAY_SCHEMA for agent_name, _, _, _ in FUSION_AGENTS},
+    "required": [f"{agent_name}_adaptations" for agent_name, _, _, _ in FUSION_AGENTS]
+}
+
+# One adaptations list per event, for the batched call
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "batches": {
+            "type": "array",
+            "items": {
                 "type": "object",
-                "properties": {
-                "adaptations": {
-                    "type": "array",
-                    "items": {
-                    "type": "object",
-                    "properties": {
-                        "action": {
-                        "type": "string",
-                        "description": "The type of UI adaptation to perform",
-                        },
-                        "target": {
-                        "type": "string",
-                        "description": "The UI element or component to apply the adaptation to, 'all' is also an option, if targeting all elements",
-                        },
-                        "value": {
-                        "type": "number",
-                        "description": "Numeric multiplier for size changes (e.g., 1.5 for 50% larger)"
-                        },
-                        "mode": {
-                        "type": "string",
-                        "description": "Interaction mode or visual mode to switch to (e.g., 'voice', 'gesture', 'high' for contrast)",
-                        },
-                        "reason": {
-                        "type": "string",
-                        "description": "Human-readable explanation of why this adaptation was suggested based on the user event and context"
-                        },
-                        "intent": {
-                        "type": "string",
-                        "description": "The inferred user intent, what did you think the user's intent was based on the user input event?"
-                        },
-                    },
-                    "required": ["action", "target", "reason", "intent"],
-                    "oneOf": [
-                        {"required": ["value"]},
-                        {"required": ["mode"]}
-                    ]
-                    }
-                }
-                },
+                "properties": {"adaptations": ADAPTATIONS_ARRAY_SCHEMA},
                 "required": ["adaptations"]
-            },
-                    temperature=temp,
-                    thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
-                    system_instruction="You are an expert in multimodal AI-driven GUI adaptation. Analyze user events and suggest UI adaptations based on accessibility needs and interaction history. Youre part of a multi-agent system, each agent has its own focus and allowed actions.",
-                ),
-            )
-            signal.alarm(0)  # Cancel alarm
-            return json.loads(response.text)["adaptations"]
-        except (Exception, TimeoutError) as e:
-            signal.alarm(0)  # Cancel alarm
-            print(f"Gemini error in agent: {e}")
-            return []
+            }
+        }
+    },
+    "required": ["batches"]
+}
+
+RESPONSE_SCHEMAS = {"adaptation": ADAPTATION_SCHEMA, "combined": COMBINED_SCHEMA, "batch": BATCH_SCHEMA}
+
+MA_SIF_SYSTEM_INSTRUCTION = "You are an expert in multimodal AI-driven GUI adaptation. Analyze user events and suggest UI adaptations based on accessibility needs and interaction history. Youre part of a multi-agent system, each agent has its own focus and allowed actions."
+
+# Stream a Gemini response and join the text chunks as they arrive
+async def stream_text_async(prompt, model, config) -> str:
+    chunks = []
+    async for chunk in await gemini_client().aio.models.generate_content_stream(model=model, contents=prompt, config=config):
+        if chunk.text:
+            chunks.append(chunk.text)
+    return "".join(chunks)
+
+# Generate configs only vary by schema and model settings, so each combination is built once
+@lru_cache(maxsize=32)
+def generate_config(schema_name: str, thinking_budget: int, temp: float) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_json_schema=RESPONSE_SCHEMAS[schema_name],
+        temperature=temp,
+        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+        system_instruction=MA_SIF_SYSTEM_INSTRUCTION,
+    )
+
+# Gemini API call returning the parsed JSON response, bounded by asyncio.wait_for
+async def generate_json_async(prompt, model, schema_name, thinking_budget=0, temp=0.2, timeout=15):
+    config = generate_config(schema_name, thinking_budget, temp)
+    response_text = await asyncio.wait_for(stream_text_async(prompt, model, config), timeout=timeout)
+    return orjson.loads(response_text)
+
+# Gemini API call for a single agent
+async def call_gemini_async(prompt, model, thinking_budget=0, temp=0.2, timeout=15):
+    try:
+        response = await generate_json_async(prompt, model, "adaptation", thinking_budget, temp, timeout)
+        return response["adaptations"]
+    except asyncio.TimeoutError:
+        logger.warning("Gemini error in agent: call to %s timed out after %ss", model, timeout)
+        return []
+    except Exception as e:
+        logger.warning("Gemini error in agent: %s", e)
+        return []
+
+# Gemini API call answering all agent roles at once, one list of suggestions per agent
+async def call_gemini_combined(agent_prompts: Dict[str, str], model, thinking_budget=0, temp=0.2, timeout=15) -> List[List[Dict]]:
+    prompt = "You take on the role of each agent below at once. Answer every role separately in its own list of adaptations.\n\n" + "\n\n".join(
+        f"--- {agent_name}_adaptations ---\n{agent_prompt}" for agent_name, agent_prompt in agent_prompts.items()
+    )
+    try:
+        response = await generate_json_async(prompt, model, "combined", thinking_budget, temp, timeout)
+        return [response.get(f"{agent_name}_adaptations", []) for agent_name in agent_prompts]
+    except asyncio.TimeoutError:
+        logger.warning("Gemini error in combined agents: call to %s timed out after %ss", model, timeout)
+    except Exception as e:
+        logger.warning("Gemini error in combined agents: %s", e)
+    return [[] for _ in agent_prompts]
+
+# Events answered without Gemini: trivial events, fast-path mock adaptations and fusion cache hits.
+# Returns (adaptations or None when the event needs fusion, fusion cache key or None when it wasn't computed)
+def fusion_shortcut(event: Event, event_dict: Dict, profile: Dict, history: List[Dict]) -> Tuple[Optional[List[Dict]], Optional[bytes]]:
+    if is_trivial_event(event, profile, history):
+        logger.debug("\033[96mTrivial event, no adaptations needed\033[0m")
+        return [], None
+
+    if is_simple_event(event, profile, history):
+        mock_adaptations = mock_fusion(event, profile, history)
+        if mock_adaptations:
+            logger.debug("\033[96mFast path adaptations: %s\033[0m", mock_adaptations)
+            return mock_adaptations, None
+
+    cache_key = fusion_cache_key(event_dict, profile, history)
+    cached_adaptations = fusion_cache.get(cache_key)
+    if cached_adaptations is not None:
+        fusion_cache_stats["hits"] += 1
+        logger.debug("\033[96mFusion cache hit (%d hits, %d misses): %s\033[0m", fusion_cache_stats["hits"], fusion_cache_stats["misses"], cached_adaptations)
+    return cached_adaptations, cache_key
+
+# Multi-Agent Smart Intent Fusion (MA-SIF)
+async def ma_smart_intent_fusion(event: Event, profile: Dict, history: List[Dict], event_dict: Optional[Dict] = None, event_json: Optional[str] = None) -> List[Dict]:
+    """Multi-Agent Smart Intent Fusion using Gemini LLMs, event_dict/event_json can be passed in pre-serialized"""
+    if event_dict is None:
+        event_dict = event.model_dump(exclude_none=True)
+    if event_json is None:
+        event_json = orjson.dumps(event_dict).decode()
+    logger.debug("---------------------------------")
+    logger.debug("Processing event: %s", event_json)
+
+    shortcut_adaptations, cache_key = fusion_shortcut(event, event_dict, profile, history)
+    if shortcut_adaptations is not None:
+        return shortcut_adaptations
+    fusion_cache_stats["misses"] += 1
+    history = history[-PROMPT_HISTORY_EVENTS:]
+    tier_override = model_tier_override(event, profile, history)
+
+    profile_json = orjson.dumps(prompt_profile(profile)).decode()
+    history_json = compact_history_json(history)
 
     # Collect all suggestions
     all_adaptations = []
+    final_adaptations = []
 
-    # Iterate through each agent (except validator) in the SIF configuration
-    for agent_name, agent_config in sif_config["agents"].items():
-        if agent_name == "validator":
-            continue  # Skip validator for now, handled later
-
-        agent_prompt = agent_config["prompt"].format(
+    # Build the prompt for each agent (except validator) in the SIF configuration
+    agent_prompts = {}
+    agent_model_settings = {}
+    for agent_name, agent_template, agent_tail, agent_config in FUSION_AGENTS:
+        agent_prompt = agent_template.substitute(
             event_json=event_json,
             profile_json=profile_json,
             history_json=history_json
-        ) + "\nAllowed actions: " + ", ".join(agent_config["allowed_actions"]) + " with as focus: " + ", ".join(agent_config.get("focus", [])) + "\n"
-        
-        # Call Gemini API for each agent
-        agent_config_model = agent_config.get("model_settings", {})
-        agent_suggestions = call_gemini_with_timeout(agent_prompt, model=agent_config_model.get("model", "gemini-2.5-flash-lite"), thinking_budget=agent_config_model.get("thinking_budget", 0), temp=agent_config_model.get("temperature", 0.2), timeout=agent_config_model.get("timeout", 15))
+        ) + agent_tail
+
+        agent_prompts[agent_name] = agent_prompt
+        agent_model_settings[agent_name] = {**agent_config.get("model_settings", {}), **tier_override}
+
+    combined_call = sif_config.get("combined_call", {})
+    if combined_call.get("enabled"):
+        # Single Gemini call for all agents, pays one request overhead instead of one per agent
+        combined_model_setting = {**combined_call.get("model_settings", {}), **tier_override}
+        agent_results = await call_gemini_combined(agent_prompts, model=combined_model_setting.get("model", "gemini-2.5-flash-lite"), thinking_budget=combined_model_setting.get("thinking_budget", 0), temp=combined_model_setting.get("temperature", 0.2), timeout=combined_model_setting.get("timeout", 15))
+    else:
+        # Call Gemini API for all agents concurrently, latency is bounded by the slowest agent
+        agent_results = await asyncio.gather(*(
+            call_gemini_async(agent_prompts[agent_name], model=agent_config_model.get("model", "gemini-2.5-flash-lite"), thinking_budget=agent_config_model.get("thinking_budget", 0), temp=agent_config_model.get("temperature", 0.2), timeout=agent_config_model.get("timeout", 15))
+            for agent_name, agent_config_model in agent_model_settings.items()
+        ), return_exceptions=True)
+        # One agent failing (or being cancelled) must not take down the others' suggestions
+        agent_results = [[] if isinstance(result, BaseException) else result for result in agent_results]
 
+    for agent_name, agent_suggestions in zip(agent_prompts, agent_results):
         if agent_suggestions:
             colors = ["\033[92m", "\033[94m", "\033[95m", "\033[91m"]
             color = colors[len(all_adaptations) % len(colors)]
-            print(f"{color}{agent_name} suggestions: {agent_suggestions}\033[0m")
+            logger.debug("%s%s suggestions: %s\033[0m", color, agent_name, agent_suggestions)
             # Add agent name to each suggestion
             for suggestion in agent_suggestions:
                 suggestion["agent"] = agent_name
             all_adaptations.extend(agent_suggestions)
         else:
-            print(f"\033[91m{agent_name} failed to provide suggestions\033[0m")
+            logger.debug("\033[91m%s failed to provide suggestions\033[0m", agent_name)
 
-    if all_adaptations:
+    if all_adaptations and len(all_adaptations) < VALIDATOR_MIN_ADAPTATIONS:
+        # Nothing to reconcile, a single suggestion can't conflict with another one
+        final_adaptations = all_adaptations
+    elif all_adaptations:
         # Call the validator agent with all or some adaptations
-        validator_prompt = sif_config["agents"]["validator"]["prompt"].format(
-            adaptations_json=json.dumps(all_adaptations),
+        validator_prompt = VALIDATOR_TEMPLATE.substitute(
+            adaptations_json=orjson.dumps(all_adaptations).decode(),
             event_json=event_json,
             profile_json=profile_json,
             history_json=history_json
-        ) + "\nAllowed actions: " + ", ".join(sif_config["agents"]["validator"]["allowed_actions"]) + "\n"
+        ) + VALIDATOR_TAIL
 
         # Get model settings for the validator
-        validator_model_setting = sif_config["agents"]["validator"].get("model_settings", {})
+        validator_model_setting = {**VALIDATOR_CONFIG.get("model_settings", {}), **tier_override}
 
         # Call Gemini API for the validator
-        final_adaptations = call_gemini_with_timeout(validator_prompt, model=validator_model_setting.get("model", "gemini-2.5-flash"), thinking_budget=validator_model_setting.get("thinking_budget", -1), temp=validator_model_setting.get("temperature", 0.3), timeout=validator_model_setting.get("timeout", 30))
+        final_adaptations = await call_gemini_async(validator_prompt, model=validator_model_setting.get("model", "gemini-2.5-flash"), thinking_budget=validator_model_setting.get("thinking_budget", -1), temp=validator_model_setting.get("temperature", 0.3), timeout=validator_model_setting.get("timeout", 30))
 
     if final_adaptations:
-        print(f"\033[96mFinal adaptations: {final_adaptations}\033[0m")
-        # Compare adaptations counts
-        total_suggestions = len(all_adaptations)
-        accepted_count = len(final_adaptations)
-        print(f"\033[93mValidator accepted {accepted_count} out of {total_suggestions} total suggestions\033[0m")
-        
-        # Print all accepted actions
-        for adaptation in final_adaptations:
-            reason = adaptation.get('validator_reason') or adaptation.get('reason', 'no reason')
-            print(f"  - {adaptation.get('action', 'unknown')} on {adaptation.get('target', 'unknown')}: {reason}")
+        # The validator summary is only formatted when the trace is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\033[96mFinal adaptations: %s\033[0m", final_adaptations)
+            # Compare adaptations counts
+            logger.debug("\033[93mValidator accepted %d out of %d total suggestions\033[0m", len(final_adaptations), len(all_adaptations))
+            # Log all accepted actions
+            for adaptation in final_adaptations:
+                reason = adaptation.get('validator_reason') or adaptation.get('reason', 'no reason')
+                logger.debug("  - %s on %s: %s", adaptation.get('action', 'unknown'), adaptation.get('target', 'unknown'), reason)
 
+        fusion_cache[cache_key] = final_adaptations
         return final_adaptations
     elif all_adaptations:
-        print("\033[91mValidator failed, returning combined agent suggestions\033[0m")
-        print(f"Adaptations from all agents: {all_adaptations}")
+        logger.warning("\033[91mValidator failed, returning combined agent suggestions\033[0m")
+        logger.debug("Adaptations from all agents: %s", all_adaptations)
         return all_adaptations
     else:
         # Ultimate fallback
-        print("\033[91mAll agents failed, using mock fusion\033[0m")
+        logger.warning("\033[91mAll agents failed, using mock fusion\033[0m")
         return mock_fusion(event, profile, history)
 
+# Batched Smart Intent Fusion, one Gemini call for a burst of events
+async def batch_intent_fusion(contexts: List[Tuple[Event, Dict, Dict, List[Dict]]]) -> List[List[Dict]]:
+    """Fuse several (event, event_dict, profile, history) contexts, one adaptations list per context.
+    Trivial, fast-path and cached events are answered on their own, only the rest share a Gemini call"""
+    results = [fusion_shortcut(event, event_dict, profile, history)[0] for event, event_dict, profile, history in contexts]
+    pending = [index for index, adaptations in enumerate(results) if adaptations is None]
+    if len(pending) == 1:
+        event, event_dict, profile, history = contexts[pending[0]]
+        results[pending[0]] = await ma_smart_intent_fusion(event, profile, history, event_dict)
+    elif pending:
+        batches = await gemini_batch_fusion([contexts[index] for index in pending])
+        for index, adaptations in zip(pending, batches):
+            results[index] = adaptations
+    return results
+
+async def gemini_batch_fusion(contexts: List[Tuple[Event, Dict, Dict, List[Dict]]]) -> List[List[Dict]]:
+    """Fuse several (event, event_dict, profile, history) contexts in a single Gemini call, one adaptations list per context"""
+    contexts_json = orjson.dumps([
+        {"event": event_dict, "profile": prompt_profile(profile), "history": compact_history(history)}
+        for event, event_dict, profile, history in contexts
+    ], default=str).decode()
+    prompt = (
+        "You're the batch suggestion Agent. Several user events arrived in quick succession, each with its user profile and recent history: "
+        + contexts_json
+        + "\nFor every event, in the same order, suggest UI adaptations as JSON in the strict format. Return exactly one entry in 'batches' per event."
+        + "\nAllowed actions: " + BATCH_ALLOWED_ACTIONS + "\n"
+    )
+
+    batch_model_setting = sif_config.get("batch_call", {}).get("model_settings", {})
+    model = batch_model_setting.get("model", "gemini-2.5-flash-lite")
+    timeout = batch_model_setting.get("timeout", 15)
+    try:
+        response = await generate_json_async(prompt, model, "batch", batch_model_setting.get("thinking_budget", 0), batch_model_setting.get("temperature", 0.2), timeout)
+        batches = [batch.get("adaptations", []) for batch in response["batches"]]
+        if len(batches) == len(contexts):
+            # Misses are counted here only once the batch call succeeds, the one-by-one fallback counts its own
+            fusion_cache_stats["misses"] += len(contexts)
+            logger.debug("\033[96mBatch fusion for %d events: %s\033[0m", len(contexts), batches)
+            return batches
+        logger.warning("\033[91mBatch fusion returned %d results for %d events\033[0m", len(batches), len(contexts))
+    except asyncio.TimeoutError:
+        logger.warning("Gemini error in batch fusion: call to %s timed out after %ss", model, timeout)
+    except Exception as e:
+        logger.warning("Gemini error in batch fusion: %s", e)
+
+    # Fall back to fusing every event on its own
+    logger.warning("\033[91mBatch fusion failed, fusing events one by one\033[0m")
+    return [await ma_smart_intent_fusion(event, profile, history, event_dict) for event, event_dict, profile, history in contexts]
+
+# Cross-session micro-batching: events from all WebSocket sessions arriving within window_ms of each other
+# are fused in one batch_intent_fusion call, every session awaits the future for its own event
+fusion_batch_queue: asyncio.Queue = asyncio.Queue()
+fusion_batch_tasks = set()
+
+def cross_session_batching() -> bool:
+    batch_call = sif_config.get("batch_call", {})
+    return bool(batch_call.get("enabled") and batch_call.get("cross_session"))
+
+async def fuse_in_batch(context: Tuple[Event, Dict, Dict, List[Dict]]) -> List[Dict]:
+    future = asyncio.get_running_loop().create_future()
+    fusion_batch_queue.put_nowait((context, future))
+    return await future
+
+async def run_fusion_batch(batch: List[Tuple[Tuple[Event, Dict, Dict, List[Dict]], asyncio.Future]]):
+    contexts = [context for context, _ in batch]
+    try:
+        if len(contexts) > 1:
+            results = await batch_intent_fusion(contexts)
+        else:
+            event, event_dict, profile, history = contexts[0]
+            results = [await ma_smart_intent_fusion(event, profile, history, event_dict)]
+    except Exception as e:
+        results = [e] * len(batch)
+    for (_, future), result in zip(batch, results):
+        if future.done():  # The session went away while its event was being fused
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+# Collects queued events into batches, each batch is fused in its own task so the next window opens right away
+async def fusion_batcher():
+    batch_call = sif_config.get("batch_call", {})
+    max_events = batch_call.get("max_events", 8)
+    window_s = batch_call.get("window_ms", 20) / 1000
+    stopping = False
+    while not stopping:
+        batch, stopping = await next_batch(fusion_batch_queue, max_events, window_s)
+        if batch:
+            task = asyncio.create_task(run_fusion_batch(batch))
+            fusion_batch_tasks.add(task)
+            task.add_done_callback(fusion_batch_tasks.discard)
+    await asyncio.gather(*fusion_batch_tasks, return_exceptions=True)
+
 # Smart Intent Fusion (Gemini LLM integration for reasoning and intent inference)
-def smart_intent_fusion(event: Event, profile: Dict, history: List[Dict]) -> List[Dict]:
-    prompt = f"""
-    Analyze this user event: {event.model_dump_json()}
-    User profile: {json.dumps(profile)}
-    Recent history (last 10 events): {json.dumps(history)}
+SIF_TIMEOUT_MS = 15_000
+SIF_SYSTEM_INSTRUCTION = "You are an expert in multimodal AI-driven GUI adaptation. Analyze user events and suggest UI adaptations based on accessibility needs and interaction history."
+SIF_GENERATE_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_json_schema=ADAPTATION_SCHEMA,
+    temperature=0.2,
+    thinking_config=types.ThinkingConfig(thinking_budget=-1),
+    system_instruction=SIF_SYSTEM_INSTRUCTION,
+    http_options=types.HttpOptions(timeout=SIF_TIMEOUT_MS),  # Request-level timeout
+)
+
+# Single-agent SIF results, keyed like fusion_cache but stored apart since the two pipelines answer differently.
+# Only Gemini answers are cached, the mock fallback is not
+sif_cache = TTLCache(maxsize=10_000, ttl=300)
+
+SIF_PROMPT_TEMPLATE = prompt_template("""
+    Analyze this user event: {event_json}
+    User profile: {profile_json}
+    Recent history (latest events, oldest first): {history_json}
     Suggest UI adaptations as JSON.
     Focus on accessibility and multimodal fusion (e.g., voice + miss_tap → enlarge + trigger). 
     Ensure actions are in ["increase_size", "reposition_element", "increase_contrast", "switch_mode", "trigger_button", "simplify_layout"].
     Switch modes only entails changing the interaction mode, not the UI layout. eg. "switch_mode": "voice" or "switch_mode": "gesture".
     Also ensure that the adaptations are tailored to the user's specific needs and context. Use the given User profile to make drastic UI changes, atleast increase_contrast and simplify_layout.
-    """
-    # print(f"Prompt for Gemini: {prompt}")
-    # Call Gemini API for intent fusion
+    """)
+
+async def smart_intent_fusion(event: Event, profile: Dict, history: List[Dict]) -> List[Dict]:
+    event_dict = event.model_dump(exclude_none=True)
+    cache_key = fusion_cache_key(event_dict, profile, history)
+    cached_adaptations = sif_cache.get(cache_key)
+    if cached_adaptations is not None:
+        return cached_adaptations
+
+    prompt = SIF_PROMPT_TEMPLATE.substitute(
+        event_json=orjson.dumps(event_dict).decode(),
+        # Same compact context as the MA-SIF agents: the profile without its embedded history, the latest events trimmed
+        profile_json=orjson.dumps(prompt_profile(profile), default=str).decode(),
+        history_json=compact_history_json(history)
+    )
+    # logger.debug("Prompt for Gemini: %s", prompt)
+    # Call Gemini API for intent fusion (async client, the event loop keeps serving other connections)
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=prompt,
-            config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_json_schema={
-                "type": "object",
-                "properties": {
-                "adaptations": {
-                    "type": "array",
-                    "items": {
-                    "type": "object",
-                    "properties": {
-                        "action": {
-                        "type": "string",
-                        "description": "The type of UI adaptation to perform",
-                        },
-                        "target": {
-                        "type": "string",
-                        "description": "The UI element or component to apply the adaptation to, 'all' is also an option, if targeting all elements",
-                        },
-                        "value": {
-                        "type": "number",
-                        "description": "Numeric multiplier for size changes (e.g., 1.5 for 50% larger)"
-                        },
-                        "mode": {
-                        "type": "string",
-                        "description": "Interaction mode or visual mode to switch to (e.g., 'voice', 'gesture', 'high' for contrast)",
-                        },
-                        "reason": {
-                        "type": "string",
-                        "description": "Human-readable explanation of why this adaptation was suggested based on the user event and context"
-                        },
-                        "intent": {
-                        "type": "string",
-                        "description": "The inferred user intent, what did you think the user's intent was based on the user input event?"
-                        },
-                    },
-                    "required": ["action", "target", "reason", "intent"],
-                    "oneOf": [
-                        {"required": ["value"]},
-                        {"required": ["mode"]}
-                    ]
-                    }
-                }
-                },
-                "required": ["adaptations"]
-            },
-            temperature=0.2,
-            thinking_config=types.ThinkingConfig(thinking_budget=-1),
-            system_instruction="You are an expert in multimodal AI-driven GUI adaptation. Analyze user events and suggest UI adaptations based on accessibility needs and interaction history.",
-            ),
-        )
-        print(response.text)
-        return json.loads(response.text)["adaptations"]
+        response_text = await stream_text_async(prompt, "gemini-2.5-flash", SIF_GENERATE_CONFIG)
+        logger.debug("%s", response_text)
+        adaptations = orjson.loads(response_text)["adaptations"]
+        sif_cache[cache_key] = adaptations
+        return adaptations
     except Exception as e:
-        print(f"Gemini API error: {e}, using mock")
+        logger.warning("Gemini API error: %s, using mock", e)
         return mock_fusion(event, profile, history)
 
-# Log adaptation
-async def log_adaptation(event: Event, adaptations: List[Dict], background_tasks: BackgroundTasks):
+# Log timestamps: the second-resolution part is formatted once per second and reused,
+# only the milliseconds are formatted per event
+log_stamp_cache = {"second": None, "prefix": ""}
+
+def utc_log_timestamp() -> str:
+    now_ms = time.time_ns() // 1_000_000
+    second, millis = divmod(now_ms, 1000)
+    if second != log_stamp_cache["second"]:
+        log_stamp_cache["second"] = second
+        log_stamp_cache["prefix"] = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{log_stamp_cache['prefix']}.{millis:03d}+00:00"
+
+# Log adaptation, both the JSONL line and the MongoDB document are queued for their batch writers
+def log_adaptation(event_dict: Dict, now_iso: str, adaptations: List[Dict]):
     log_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "context": event.dict(exclude_none=True),
+        "timestamp": now_iso,
+        "context": event_dict,
         "adaptations": adaptations
     }
-    background_tasks.add_task(logs_collection.insert_one, log_entry)
-    # Optional: Keep jsonl
-    with open("adaptation_log.jsonl", "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
-
-# Update user history
-async def append_event(user_id: str, event_data: str):
-    profiles_collection.update_one(
-        {"user_id": user_id}, 
-        {"$push": {"interaction_history": {"$each": [event_data], "$slice": -10}}}
-    )
+    # Optional: Keep jsonl (serialized first, insert_many adds a non-serializable _id)
+    adaptation_log_queue.put_nowait(orjson.dumps(log_entry) + b"\n")
+    mongo_write_queue.put_nowait(("log", log_entry))
+
+# Wait for the first queued item, then keep collecting until max_items or window_s after it.
+# Returns (batch, stopping), stopping is set once the None sentinel has been taken
+async def next_batch(queue: asyncio.Queue, max_items: int, window_s: float) -> Tuple[List, bool]:
+    item = await queue.get()
+    if item is None:
+        return [], True
+    batch = [item]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + window_s
+    while len(batch) < max_items:
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout=max(0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            break
+        if item is None:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+# Adaptation JSONL log, queued lines are batched into a single write on one long-lived file handle.
+# A batch closes at 64 lines or 100 ms after its first line, None stops the writer after a final flush
+adaptation_log_queue: asyncio.Queue = asyncio.Queue()
+LOG_BATCH_LINES = 64
+LOG_BATCH_WINDOW_S = 0.1
+
+async def adaptation_log_writer():
+    async with aiofiles.open("adaptation_log.jsonl", "ab") as f:
+        stopping = False
+        while not stopping:
+            lines, stopping = await next_batch(adaptation_log_queue, LOG_BATCH_LINES, LOG_BATCH_WINDOW_S)
+            if lines:
+                await f.write(b"".join(lines))
+                await f.flush()
+
+# Update user history, only the latest HISTORY_LIMIT events are kept
+HISTORY_LIMIT = 10
+
+def append_event(user_id: str, event_data: Dict):
+    mongo_write_queue.put_nowait(("history", (user_id, event_data)))
+
+# Batched MongoDB writes: queued log documents go out in one insert_many and history pushes in one
+# bulk_write per batch. Size and window are tunable through MONGO_BATCH_SIZE / MONGO_BATCH_WINDOW_MS
+mongo_write_queue: asyncio.Queue = asyncio.Queue()
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "100"))
+MONGO_BATCH_WINDOW_S = int(os.getenv("MONGO_BATCH_WINDOW_MS", "50")) / 1000
+
+async def mongo_writer():
+    stopping = False
+    while not stopping:
+        writes, stopping = await next_batch(mongo_write_queue, MONGO_BATCH_SIZE, MONGO_BATCH_WINDOW_S)
+        log_entries = []
+        user_events: Dict[str, List[Dict]] = {}  # One $push per user, events stay in arrival order
+        for kind, payload in writes:
+            if kind == "log":
+                log_entries.append(payload)
+            else:
+                user_id, event_data = payload
+                user_events.setdefault(user_id, []).append(event_data)
+
+        if log_entries:
+            try:
+                await logs_collection.insert_many(log_entries, ordered=False)
+            except Exception as e:
+                logger.error("MongoDB log batch error: %s", e)
+        if user_events:
+            try:
+                await profiles_collection.bulk_write([
+                    UpdateOne(
+                        {"user_id": user_id},
+                        {"$push": {"interaction_history": {"$each": events, "$slice": -HISTORY_LIMIT}}},
+                        upsert=True
+                    )
+                    for user_id, events in user_events.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error("MongoDB history batch error: %s", e)
+
+# Mirror the push in the cached profile so the next event sees it without waiting on (or refetching from) MongoDB
+def append_cached_event(user_id: str, event_data: Dict):
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        cached["interaction_history"] = (cached.get("interaction_history", []) + [event_data])[-HISTORY_LIMIT:]
+
+# Update user profile
+async def update_profile(profile: Dict):
+    await profiles_collection.update_one({"user_id": profile.get("user_id")}, {"$set": profile}, upsert=True)
+
+# Write-through: apply a profile write to the cached copy, mirroring a top-level $set
+def cache_profile_update(profile: Dict):
+    user_id = profile.get("user_id")
+    cached = profile_cache.get(user_id, {})
+    profile_cache[user_id] = {**cached, **{k: v for k, v in profile.items() if k != "_id"}}
+    if "interaction_history" in profile:
+        profile_cache[user_id]["interaction_history"] = history_documents(profile["interaction_history"] or [])
+
+# Profiles stored before history events became documents hold them as JSON strings (model_dump_json),
+# those are decoded on load. Entries that don't decode to an event document are dropped
+def history_documents(history: List) -> List[Dict]:
+    events = []
+    for past_event in history:
+        if isinstance(past_event, (str, bytes)):
+            try:
+                past_event = orjson.loads(past_event)
+            except orjson.JSONDecodeError:
+                continue
+        if isinstance(past_event, dict):
+            events.append(past_event)
+    return events
 
 # Load user profile from MongoDB
 async def load_profile(user_id: str) -> Dict:
-    profile = profiles_collection.find_one({"user_id": user_id}, {'_id': 0})
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        # Trim the history at the database as well, older documents may predate the $push slice
+        profile = await profiles_collection.find_one({"user_id": user_id}, {'_id': 0, "interaction_history": {"$slice": -HISTORY_LIMIT}})
+        if profile is not None:
+            profile["interaction_history"] = history_documents(profile.get("interaction_history") or [])
+            profile_cache[user_id] = profile
     return profile
 
+# Default profile for users without a stored profile
+def default_profile(user_id: str) -> Dict:
+    return {
+        "user_id": user_id,
+        "interaction_history": [],
+        "accessibility_needs": {},
+        "input_preferences": {},
+        "ui_preferences": {}
+    }
+
+# Per-connection limits: events are small JSON objects, and a client can't run further ahead
+# of fusion than MAX_PENDING_EVENTS frames (the receiver waits for room in the queue)
+MAX_EVENT_BYTES = 8192
+MAX_BATCH_FRAME_EVENTS = 32
+MAX_FRAME_BYTES = MAX_EVENT_BYTES * MAX_BATCH_FRAME_EVENTS
+MAX_PENDING_EVENTS = 32
 
+# A frame is either a single event, answered with {"adaptations": [...]}, or a batch frame
+# {"events": [...]}, answered with one {"adaptations_batch": [[...], ...]} in the same order
+Frame = Tuple[List[Event], bool]
+
+# TRUSTED_WS=1 skips pydantic validation for WebSocket events (benchmarks, trusted internal clients),
+# the fields are taken as sent. Leave it unset for public deployments
+TRUSTED_WS = os.getenv("TRUSTED_WS") == "1"
+build_event = Event.model_construct if TRUSTED_WS else Event
+
+# None when the frame is over the size limits: more than MAX_FRAME_BYTES, more than MAX_BATCH_FRAME_EVENTS events
+# in a batch frame, or a single event over MAX_EVENT_BYTES. The limits are checked before any event is built
+def parse_frame(raw: bytes) -> Optional[Frame]:
+    if len(raw) > MAX_FRAME_BYTES:
+        return None
+    data = orjson.loads(raw)
+    if isinstance(data, dict) and "events" in data:
+        if len(data["events"]) > MAX_BATCH_FRAME_EVENTS:
+            return None
+        return [build_event(**event_data) for event_data in data["events"]], True
+    if len(raw) > MAX_EVENT_BYTES:
+        return None
+    return [build_event(**data)], False
+
+# Read frames from the WebSocket into a queue, None marks the end of the stream
+async def receive_events(websocket: WebSocket, event_queue: asyncio.Queue):
+    try:
+        while True:
+            # The limits are in bytes, so the text frame is measured (and parsed) as UTF-8
+            raw = (await websocket.receive_text()).encode()
+            frame = parse_frame(raw)
+            if frame is None:
+                logger.warning("WebSocket message of %d bytes exceeds the frame limits, closing", len(raw))
+                await websocket.close(code=1009)
+                break
+            await event_queue.put(frame)
+    except asyncio.CancelledError:
+        raise  # The handler is already shutting down, nobody is waiting for the end marker
+    except WebSocketDisconnect:
+        pass  # The client went away, end the stream
+    except Exception as e:
+        # Malformed JSON, invalid events or a malformed batch frame end the stream
+        logger.warning("WebSocket receive error: %s, closing down", e, exc_info=True)
+    await event_queue.put(None)
+
+# Wait for the next frame. With batching enabled, also take every frame that queued up during the previous fusion
+async def next_frames(event_queue: asyncio.Queue) -> List[Optional[Frame]]:
+    frames = [await event_queue.get()]
+    batch_call = sif_config.get("batch_call", {})
+    if not batch_call.get("enabled"):
+        return frames
+    max_events = batch_call.get("max_events", 8)
+    queued_events = len(frames[0][0]) if frames[0] is not None else 0
+    while frames[-1] is not None and queued_events < max_events and not event_queue.empty():
+        frames.append(event_queue.get_nowait())
+        queued_events += len(frames[-1][0]) if frames[-1] is not None else 0
+    return frames
+
+# Fusion context of one event: (event, event_dict, profile, history)
+async def event_context(event: Event) -> Tuple[Event, Dict, Dict, List[Dict]]:
+    profile = await load_profile(event.user_id)
+    if profile is None:
+        # Cache the default so this user's next events (and history mirroring) skip MongoDB
+        profile = profile_cache.setdefault(event.user_id, default_profile(event.user_id))
+    # Serialize the event once, shared by fusion, history and logging
+    return event, event.model_dump(exclude_none=True), profile, profile.get("interaction_history", [])
 
 # WebSocket endpoint for real-time adaptation
 @app.websocket("/ws/adapt")
-async def websocket_adapt(websocket: WebSocket, background_tasks: BackgroundTasks):
+async def websocket_adapt(websocket: WebSocket):
     websocket.receive_timeout = 600  # Set timeout to 10 minutes (600 seconds)
     await websocket.accept()
+    event_queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+    receiver = asyncio.create_task(receive_events(websocket, event_queue))
     try:
         while True:
-            data = await websocket.receive_json()
-            event = Event(**data)
-            profile = await load_profile(event.user_id) or {
-                "user_id": event.user_id,
-                "interaction_history": [],
-                "accessibility_needs": {},
-                "input_preferences": {},
-                "ui_preferences": {}
-            }
-            history = profile.get("interaction_history", [])
-            adaptations = ma_smart_intent_fusion(event, profile, history)
-            await append_event(event.user_id, event.model_dump_json())
-            await log_adaptation(event, adaptations, background_tasks)
-            # print(f"Adaptations: {adaptations}")
-            await websocket.send_json({"adaptations": adaptations})
+            frames = await next_frames(event_queue)
+            stream_closed = frames[-1] is None
+            frames = [frame for frame in frames if frame is not None]
+
+            if sif_config.get("batch_call", {}).get("enabled"):
+                # Bursts are fused in one call, every context is loaded before the burst is fused
+                contexts = [await event_context(event) for events, _ in frames for event in events]
+                if cross_session_batching():
+                    batch_adaptations = await asyncio.gather(*(fuse_in_batch(context) for context in contexts))
+                elif len(contexts) > 1:
+                    batch_adaptations = await batch_intent_fusion(contexts)
+                else:
+                    batch_adaptations = [await ma_smart_intent_fusion(event, profile, history, event_dict) for event, event_dict, profile, history in contexts]
+                for event, event_dict, _, _ in contexts:
+                    append_cached_event(event.user_id, event_dict)
+            else:
+                # One event at a time, each is mirrored into the cached history before the next one loads its context
+                contexts = []
+                batch_adaptations = []
+                for event in (event for events, _ in frames for event in events):
+                    context = await event_context(event)
+                    event, event_dict, profile, history = context
+                    contexts.append(context)
+                    batch_adaptations.append(await ma_smart_intent_fusion(event, profile, history, event_dict))
+                    append_cached_event(event.user_id, event_dict)
+
+            position = 0
+            for events, batched in frames:
+                frame_contexts = contexts[position:position + len(events)]
+                frame_adaptations = batch_adaptations[position:position + len(events)]
+                position += len(events)
+                # logger.debug("Adaptations: %s", frame_adaptations)
+                if batched:
+                    await websocket.send_text(orjson.dumps({"adaptations_batch": frame_adaptations}).decode())
+                else:
+                    await websocket.send_text(orjson.dumps({"adaptations": frame_adaptations[0]}).decode())
+
+                # Persist after responding, the next receive doesn't wait on MongoDB or the log
+                for (event, event_dict, _, _), adaptations in zip(frame_contexts, frame_adaptations):
+                    now_iso = utc_log_timestamp()
+                    append_event(event.user_id, event_dict)
+                    log_adaptation(event_dict, now_iso, adaptations)
+
+            if stream_closed:
+                break
     except Exception as e:
-        print(f"WebSocket error: closing down")
+        logger.warning("WebSocket error: %s, closing down", e)
     finally:
-        await websocket.close()
+        receiver.cancel()
+        if websocket.application_state != WebSocketState.DISCONNECTED:
+            await websocket.close()
 
 # Profile management endpoint (manual updates for demo)
 @app.post("/profile")
-async def set_profile(profile: Dict, background_tasks: BackgroundTasks):
+async def set_profile(profile: Dict):
     internal_profile = await load_profile(profile.get("user_id"))
-    # print(f"Internal profile: {internal_profile}")
+    # logger.debug("Internal profile: %s", internal_profile)
     if not internal_profile:
-        profiles_collection.insert_one(profile)
-        print("Profile created")
+        await profiles_collection.insert_one(profile)
+        cache_profile_update(profile)
+        logger.debug("Profile created")
         return {"status": "Profile created"}
     else:
-        print("Profile updated")
-        background_tasks.add_task(profiles_collection.update_one, {"user_id": profile.get("user_id")}, {"$set": profile}, upsert=True)
-        return {"status": "Profile update queued"}
+        logger.debug("Profile updated")
+        cache_profile_update(profile)
+        await update_profile(profile)
+        return {"status": "Profile updated"}
 
 # Profile retrieval endpoint
 @app.get("/profile/{user_id}")
@@ -390,12 +977,24 @@ async def get_profile(user_id: str):
     return profile
 
 @app.get("/full_history")
-async def get_full_history():
-    history = list(profiles_collection.find({}, {'_id': 0, 'interaction_history': 1, 'user_id': 1}))
-    formatted_history = [{"user_id": doc["user_id"], "interaction_history": doc.get("interaction_history", [])} for doc in history]
-    if not history:
+async def get_full_history(skip: int = 0, limit: int = 0):
+    # Paginate over the unique user_id index, limit=0 returns all profiles
+    cursor = profiles_collection.find({}, {'_id': 0, 'interaction_history': 1, 'user_id': 1}).sort("user_id", 1).skip(skip).limit(limit)
+    first_doc = await anext(cursor, None)
+    if first_doc is None:
         raise HTTPException(404, "No interaction history found")
-    return {"history": formatted_history}
+
+    # Stream the {"history": [...]} body as documents come off the cursor instead of materializing the list
+    def format_doc(doc: Dict) -> bytes:
+        return orjson.dumps({"user_id": doc["user_id"], "interaction_history": doc.get("interaction_history", [])}, default=str)
+
+    async def stream_history():
+        yield b'{"history":[' + format_doc(first_doc)
+        async for doc in cursor:
+            yield b"," + format_doc(doc)
+        yield b"]}"
+
+    return StreamingResponse(stream_history(), media_type="application/json")
 
 # Modalities configuration endpoint
 @app.get("/modalities")
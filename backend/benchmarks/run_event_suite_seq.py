@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-import argparse, json, time, csv
-from datetime import datetime
-from websockets.sync.client import connect
+import argparse, asyncio, json, time, csv, re
+from datetime import datetime, timezone
+from websockets.asyncio.client import connect
 from websockets.exceptions import ConnectionClosedError
+from jsonschema.validators import validator_for
 
 MOCK_REASONS = [
     "Miss-tap detected, increasing target size",
@@ -10,6 +11,8 @@ MOCK_REASONS = [
     "Visual impairment detected, increasing contrast",
     "Voice input detected, switching to voice mode"
 ]
+# One alternation scan per reason instead of a substring search per mock string
+MOCK_REASONS_RE = re.compile("|".join(re.escape(sig) for sig in MOCK_REASONS))
 
 def classify(adaptations):
     if isinstance(adaptations, list):
@@ -17,11 +20,11 @@ def classify(adaptations):
             if isinstance(a, dict) and "agent" in a:
                 return "combined_agent_suggestions"
         for a in adaptations:
-            if isinstance(a, dict) and any(sig in a.get("reason","") for sig in MOCK_REASONS):
+            if isinstance(a, dict) and MOCK_REASONS_RE.search(a.get("reason","")):
                 return "mock_rule_fallback"
     return "validated_by_validator"
 
-def make_event(user_id, i):
+def make_event(user_id, i, coordinates=None):
     kinds = ["tap", "miss_tap", "voice", "gesture"]
     ev_type = kinds[i % len(kinds)]
     meta, src = {}, "touch"
@@ -32,26 +35,30 @@ def make_event(user_id, i):
     return {
         "event_type": ev_type,
         "source": src,
-        "timestamp": datetime.utcnow().isoformat()+"Z",
+        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         "user_id": user_id,
         "target_element": "button_play",
-        "coordinates": {"x": 120, "y": 240},
+        "coordinates": coordinates or {"x": 120, "y": 240},
         "confidence": 0.95,
         "metadata": meta
     }
 
-def validate_schema(payload, schema):
+def load_validator(schema):
+    # Build the validator once, jsonschema.validate would re-check the schema and rebuild it per call
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+def validate_schema(payload, validator):
     try:
-        from jsonschema import validate
-        validate(instance={"adaptations": payload}, schema=schema)
-        return True
+        return validator.is_valid({"adaptations": payload})
     except Exception:
         return False
 
-def open_ws(url, args):
+async def open_ws(url, args):
     pi = None if args.ping_interval <= 0 else args.ping_interval
     pt = None if args.ping_timeout  <= 0 else args.ping_timeout
-    return connect(
+    return await connect(
         url,
         open_timeout=args.open_timeout,
         close_timeout=args.close_timeout,
@@ -60,43 +67,29 @@ def open_ws(url, args):
         max_size=None,   # no cap
     )
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--ws", default="ws://localhost:8000/ws/adapt")
-    ap.add_argument("--user", default="user_seq")
-    ap.add_argument("--rounds", type=int, default=10)
-    ap.add_argument("--pause", type=float, default=5.0, help="sleep between events (s)")
-    ap.add_argument("--schema", default="adaptation_schema.json")
-    # keepalive / timeouts (set <=0 to disable pings)
-    ap.add_argument("--ping-interval", type=float, default=0.0, help="seconds; <=0 disables keepalive pings")
-    ap.add_argument("--ping-timeout",  type=float, default=0.0, help="seconds; <=0 disables keepalive timeouts")
-    ap.add_argument("--open-timeout",  type=float, default=30.0)
-    ap.add_argument("--close-timeout", type=float, default=120.0)
-    args = ap.parse_args()
-
-    with open(args.schema, "r") as f:
-        schema = json.load(f)
-
-    rows = []
-    ws = open_ws(args.ws, args)
+async def run_worker(args, validator, indices, rows):
+    # One connection per worker, events on a connection stay strictly send -> recv
+    ws = await open_ws(args.ws, args)
     try:
-        for i in range(args.rounds):
+        while not indices.empty():
+            i = indices.get_nowait()
             ev = make_event(args.user, i)
+            t_start = time.perf_counter()
             while True:
                 t0 = time.perf_counter()
                 try:
-                    ws.send(json.dumps(ev))
-                    raw = ws.recv()
+                    await ws.send(json.dumps(ev))
+                    raw = await ws.recv()
                     dt = (time.perf_counter() - t0) * 1000.0
                     break
                 except ConnectionClosedError:
                     # reconnect and retry this same event
                     try:
-                        ws = open_ws(args.ws, args)
-                        time.sleep(0.2)
+                        ws = await open_ws(args.ws, args)
+                        await asyncio.sleep(0.2)
                         continue
                     except Exception:
-                        time.sleep(0.5)
+                        await asyncio.sleep(0.5)
                         continue
 
             try:
@@ -105,22 +98,54 @@ def main():
             except Exception:
                 adaps = []
             cls = classify(adaps)
-            valid = validate_schema(adaps, schema)
-            rows.append({
+            # Validation is CPU-bound, keep it off the loop so other workers' recv timings aren't skewed
+            valid = await asyncio.to_thread(validate_schema, adaps, validator)
+            rows[i] = {
                 "idx": i,
                 "event_type": ev["event_type"],
                 "latency_ms": f"{dt:.2f}",
                 "classification": cls,
                 "schema_valid": 1 if valid else 0
-            })
-            if args.pause > 0:
-                time.sleep(args.pause)
+            }
+            # Pace sends --pause apart, the time spent waiting on the response counts towards it
+            slack = t_start + args.pause - time.perf_counter()
+            if slack > 0:
+                await asyncio.sleep(slack)
     finally:
         try:
-            ws.close()
+            await ws.close()
         except Exception:
             pass
 
+async def run_suite(args, validator):
+    indices = asyncio.Queue()
+    for i in range(args.rounds):
+        indices.put_nowait(i)
+    rows = {}
+    await asyncio.gather(*(run_worker(args, validator, indices, rows) for _ in range(max(1, args.concurrency))))
+    # Rows in submission order, regardless of which connection finished first
+    return [rows[i] for i in sorted(rows)]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ws", default="ws://localhost:8000/ws/adapt")
+    ap.add_argument("--user", default="user_seq")
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--pause", type=float, default=5.0, help="interval between event sends (s)")
+    ap.add_argument("--concurrency", type=int, default=1, help="parallel WebSocket connections; 1 keeps the run sequential")
+    ap.add_argument("--schema", default="adaptation_schema.json")
+    # keepalive / timeouts (set <=0 to disable pings)
+    ap.add_argument("--ping-interval", type=float, default=0.0, help="seconds; <=0 disables keepalive pings")
+    ap.add_argument("--ping-timeout",  type=float, default=0.0, help="seconds; <=0 disables keepalive timeouts")
+    ap.add_argument("--open-timeout",  type=float, default=30.0)
+    ap.add_argument("--close-timeout", type=float, default=120.0)
+    args = ap.parse_args()
+
+    with open(args.schema, "r") as f:
+        validator = load_validator(json.load(f))
+
+    rows = asyncio.run(run_suite(args, validator))
+
     out = "event_suite_seq.csv"
     with open(out, "w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=["idx","event_type","latency_ms","classification","schema_valid"])
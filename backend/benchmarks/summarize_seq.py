@@ -13,7 +13,7 @@ Usage:
 Outputs:
   - seq_summary.json
 """
-import csv, json, statistics as stats, argparse, os
+import csv, json, argparse, os
 
 def load_ws(path="ws_latency_seq.csv"):
     vals = []
@@ -28,57 +28,59 @@ def load_ws(path="ws_latency_seq.csv"):
     return vals
 
 def load_suite(path="event_suite_seq.csv"):
-    rows = []
+    # Aggregate while reading: latencies, per-class counts and schema-valid count in one pass
+    latencies, cls_counts, schema_valid, total = [], {}, 0, 0
     if os.path.exists(path):
         with open(path, "r") as f:
             r = csv.DictReader(f)
             for row in r:
-                rows.append(row)
-    return rows
+                total += 1
+                latencies.append(float(row["latency_ms"]))
+                cls = row["classification"]
+                cls_counts[cls] = cls_counts.get(cls, 0) + 1
+                schema_valid += 1 if row.get("schema_valid") == "1" else 0
+    return latencies, cls_counts, schema_valid, total
 
-def pctl(xs, p):
+def pctl(xs_sorted, p):
+    # Nearest-rank percentile on an already sorted list
+    idx = int(round((p/100.0) * (len(xs_sorted)-1)))
+    return xs_sorted[idx]
+
+def median(xs_sorted):
+    mid = len(xs_sorted) // 2
+    if len(xs_sorted) % 2:
+        return xs_sorted[mid]
+    return (xs_sorted[mid-1] + xs_sorted[mid]) / 2
+
+def latency_stats(xs):
+    # One sort serves p50, p90 and max
     if not xs:
-        return None
-    xs2 = sorted(xs)
-    idx = int(round((p/100.0) * (len(xs2)-1)))
-    return xs2[idx]
+        return {"p50": None, "p90": None, "max": None}
+    xs_sorted = sorted(xs)
+    return {
+        "p50": round(median(xs_sorted), 2),
+        "p90": round(pctl(xs_sorted, 90), 2),
+        "max": round(xs_sorted[-1], 2)
+    }
 
 def main():
     ap = argparse.ArgumentParser()
     args = ap.parse_args()
 
     ws_vals = load_ws()
-    suite = load_suite()
-
-    # WS stats
-    ws_p50 = round(stats.median(ws_vals), 2) if ws_vals else None
-    ws_p90 = round(pctl(ws_vals, 90), 2) if ws_vals else None
-    ws_max = round(max(ws_vals), 2) if ws_vals else None
+    latencies, cls_counts, schema_valid, total = load_suite()
 
     # Suite stats
-    latencies = [float(r["latency_ms"]) for r in suite] if suite else []
-    cls_counts = {}
-    schema_valid = 0
-    for r in suite:
-        cls = r["classification"]
-        cls_counts[cls] = cls_counts.get(cls, 0) + 1
-        schema_valid += 1 if r.get("schema_valid") in ("1", 1) else 0
-
-    total = len(suite)
     validated_pct = round(100.0 * cls_counts.get("validated_by_validator", 0) / total, 2) if total else None
     combined_pct  = round(100.0 * cls_counts.get("combined_agent_suggestions", 0) / total, 2) if total else None
     mock_pct      = round(100.0 * cls_counts.get("mock_rule_fallback", 0) / total, 2) if total else None
     schema_pct    = round(100.0 * (schema_valid / total), 2) if total else None
 
     summary = {
-        "ws_latency_ms": {"p50": ws_p50, "p90": ws_p90, "max": ws_max},
+        "ws_latency_ms": latency_stats(ws_vals),
         "event_suite": {
             "n": total,
-            "latency_ms": {
-                "p50": round(stats.median(latencies), 2) if latencies else None,
-                "p90": round(pctl(latencies, 90), 2) if latencies else None,
-                "max": round(max(latencies), 2) if latencies else None
-            },
+            "latency_ms": latency_stats(latencies),
             "classification_pct": {
                 "validated_by_validator": validated_pct,
                 "combined_agent_suggestions": combined_pct,
@@ -88,9 +90,11 @@ def main():
         }
     }
 
+    # Encode once, the same text goes to the file and to stdout
+    payload = json.dumps(summary, indent=2)
     with open("seq_summary.json", "w") as f:
-        json.dump(summary, f, indent=2)
-    print(json.dumps(summary, indent=2))
+        f.write(payload)
+    print(payload)
 
 if __name__ == "__main__":
     main()
@@ -5,36 +5,16 @@ Sequential WebSocket latency benchmark for /ws/adapt.
 
 Usage:
   python ws_latency_seq.py --ws ws://localhost:8000/ws/adapt --user user_seq --n 6 --pause 5
+  python ws_latency_seq.py --n 6 --batch 3   # send {"events": [...]} frames of 3 events each
 
 Outputs:
   - ws_latency_seq.csv  (i, latency_ms, event_type)
+    In batch mode every event of a frame gets the frame's round-trip latency.
 """
-import argparse, json, time, csv
-from datetime import datetime
+import argparse, time, csv
+import orjson
 from websockets.sync.client import connect
-
-def make_event(user_id: str, i: int):
-    # Deterministic cycling to keep runs comparable across configs
-    kinds = ["tap", "miss_tap", "voice", "gesture"]
-    ev_type = kinds[i % len(kinds)]
-    meta = {}
-    source = "touch"
-    if ev_type == "voice":
-        meta = {"command": "play"}
-        source = "voice"
-    elif ev_type == "gesture":
-        meta = {"gesture_type": "point"}
-        source = "gesture"
-    return {
-        "event_type": ev_type,
-        "source": source,
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "user_id": user_id,
-        "target_element": "button_play",
-        "coordinates": {"x": 100, "y": 200},
-        "confidence": 0.95,
-        "metadata": meta
-    }
+from run_event_suite_seq import make_event
 
 def main():
     ap = argparse.ArgumentParser()
@@ -42,24 +22,30 @@ def main():
     ap.add_argument("--user", default="user_seq")
     ap.add_argument("--n", type=int, default=6)
     ap.add_argument("--pause", type=float, default=5)
+    ap.add_argument("--batch", type=int, default=0, help="events per batch frame (the backend closes on more than 32); 0 sends one event per message")
     args = ap.parse_args()
 
     rows = []
+    frame_size = max(1, args.batch)
     with connect(args.ws) as ws:
-        for i in range(args.n):
-            ev = make_event(args.user, i)
+        for start in range(0, args.n, frame_size):
+            evs = [make_event(args.user, i, coordinates={"x": 100, "y": 200}) for i in range(start, min(start + frame_size, args.n))]
+            # text frames, the backend reads text messages
+            payload = orjson.dumps({"events": evs} if args.batch > 0 else evs[0]).decode()
             t0 = time.perf_counter()
-            ws.send(json.dumps(ev))
+            ws.send(payload)
             _ = ws.recv()
             dt = (time.perf_counter() - t0) * 1000.0
-            rows.append({"i": i, "latency_ms": f"{dt:.2f}", "event_type": ev["event_type"]})
-            if args.pause > 0:
-                time.sleep(args.pause)
+            rows.extend((start + j, f"{dt:.2f}", ev["event_type"]) for j, ev in enumerate(evs))
+            # Pace sends --pause apart, the measured round-trip counts towards it
+            slack = t0 + args.pause - time.perf_counter()
+            if slack > 0:
+                time.sleep(slack)
 
     out = "ws_latency_seq.csv"
     with open(out, "w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=["i","latency_ms","event_type"])
-        w.writeheader()
+        w = csv.writer(f)
+        w.writerow(["i","latency_ms","event_type"])
         w.writerows(rows)
     print(f"Wrote {out} with {len(rows)} rows")
 
@@ -64,4 +64,5 @@ fi
 # Start FastAPI backend (runs in foreground)
 echo "Starting FastAPI backend (uvicorn)..."
 # If backend.py is in this directory and defines 'app'
-uvicorn backend:app --reload --host 0.0.0.0 --port 8000 --ws websockets --ws-ping-interval 60 --ws-ping-timeout 180
\ No newline at end of file
+# uvicorn[standard] provides uvloop + httptools, pinned here so a missing install fails loudly instead of falling back to asyncio
+uvicorn backend:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --ws websockets --ws-ping-interval 60 --ws-ping-timeout 180
\ No newline at end of file
@@ -0,0 +1,72 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# backend.py reads sif_config.json relative to the working directory at import
+@pytest.fixture(scope="module")
+def backend():
+    cwd = os.getcwd()
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    try:
+        yield importlib.import_module("backend")
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(BACKEND_DIR)
+
+
+def make_event(backend, event_type, source="touch"):
+    return backend.Event(event_type=event_type, source=source, timestamp="2025-01-01T00:00:00Z", user_id="u1")
+
+
+def history_of(*event_types, source="touch"):
+    return [{"event_type": event_type, "source": source, "user_id": "u1"} for event_type in event_types]
+
+
+@pytest.fixture
+def fast_path(backend, monkeypatch):
+    monkeypatch.setitem(backend.sif_config, "fast_path", {
+        "enabled": True,
+        "event_types": ["voice", "miss_tap"],
+        "max_history": 3,
+        "trivial_event_types": ["tap"],
+        "trivial_history_window": 5,
+    })
+
+
+def test_plain_tap_is_trivial(backend, fast_path):
+    assert backend.is_trivial_event(make_event(backend, "tap"), backend.default_profile("u1"), history_of("tap", "tap"))
+
+
+def test_miss_tap_history_blocks_trivial_shortcut(backend, fast_path):
+    history = history_of("miss_tap", "miss_tap", "tap")
+    assert not backend.is_trivial_event(make_event(backend, "tap"), backend.default_profile("u1"), history)
+
+
+@pytest.fixture
+def model_tiers(backend, monkeypatch):
+    monkeypatch.setitem(backend.sif_config, "model_tiers", {
+        "enabled": True,
+        "history_window": 5,
+        "simple_model_settings": {"model": "gemini-2.5-flash-lite", "thinking_budget": 0},
+    })
+
+
+def test_routine_tap_uses_simple_tier(backend, model_tiers):
+    override = backend.model_tier_override(make_event(backend, "tap"), backend.default_profile("u1"), history_of("tap", "tap"))
+    assert override == {"model": "gemini-2.5-flash-lite", "thinking_budget": 0}
+
+
+def test_miss_tap_history_keeps_full_model(backend, model_tiers):
+    history = history_of("miss_tap", "miss_tap", "miss_tap")
+    assert backend.model_tier_override(make_event(backend, "miss_tap"), backend.default_profile("u1"), history) == {}
+
+
+def test_mock_fusion_matches_slider_miss_variants(backend):
+    adaptations = backend.mock_fusion(make_event(backend, "vertical_slider_miss"), backend.default_profile("u1"), [])
+    assert [adaptation["action"] for adaptation in adaptations] == ["increase_button_size"]
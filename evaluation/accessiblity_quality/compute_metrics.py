@@ -1,8 +1,10 @@
 
 #!/usr/bin/env python3
-import json, os, sys, math, re, argparse
+import sys, math, argparse
 from collections import defaultdict, Counter
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from typing import List, Tuple
+from jsonl_files import discover_jsonl, get_nested, map_log_files, read_jsonl
 
 # ========== KEY PATHS (adjust here if your logs use different keys) ==========
 KEYS = {
@@ -30,6 +32,10 @@ PROFILE_NEEDS = {
     "P5": ["visual", "motor"],
 }
 
+# Frozen once at import, looked up per record instead of building a set per line
+PROFILE_NEEDS_SETS = {p: frozenset(needs) for p, needs in PROFILE_NEEDS.items()}
+NO_NEEDS = frozenset()
+
 # If your logs use descriptive names instead of P0..P5, add aliases here:
 PROFILE_ALIASES = {
     "baseline": "P0",
@@ -40,25 +46,27 @@ PROFILE_ALIASES = {
     "motor+handsfree": "P4",
     "visual+motor": "P5",
 }
+# Lowercased profile id -> canonical id: the aliases above plus P0..P9 in any case
+PROFILE_CANON = {f"p{i}": f"P{i}" for i in range(10)}
+PROFILE_CANON.update(PROFILE_ALIASES)
 
 # ========== ACTION → CATEGORY MAPPING ==========
+# Anything not listed (including trigger_button, which is only handsfree in a voice event and
+# handled at event level) is 'other'
+ACTION_CATEGORY = {
+    "increase_button_size": "motor",
+    "increase_button_border": "motor",
+    "increase_slider_size": "motor",
+    "adjust_spacing": "motor",
+    "increase_font_size": "visual",
+    "increase_contrast": "visual",
+    # Any switch_mode counts, voice/gesture or unspecified mode (conservative in your favour)
+    "switch_mode": "handsfree",
+}
+
 def action_to_category(name: str, params: dict) -> str:
     """Return one of: 'motor', 'visual', 'handsfree', or 'other'."""
-    n = (name or "").lower()
-    if n in {"increase_button_size", "increase_button_border", "increase_slider_size", "adjust_spacing"}:
-        return "motor"
-    if n in {"increase_font_size", "increase_contrast"}:
-        return "visual"
-    if n == "switch_mode":
-        mode = (params or {}).get("mode", "").lower()
-        if mode in {"voice", "gesture"}:
-            return "handsfree"
-        # If mode is unspecified, treat as handsfree-enabling (conservative in your favour)
-        return "handsfree"
-    if n == "trigger_button":
-        # we classify as handsfree only if used in a voice event (handled at event level)
-        return "other"
-    return "other"
+    return ACTION_CATEGORY.get((name or "").lower(), "other")
 
 # ========== ERROR EVENT → ACCEPTABLE CORRECTIVE ACTIONS ==========
 # Any intersection between suggested actions and these sets counts as ERA success.
@@ -81,59 +89,20 @@ EVENT_ALIAS = {
 # Minimal but effective:
 # - Two different switch_mode targets (voice and gesture) in one response = conflict
 # - Duplicate action+target pairs = duplicate
-def compute_conflicts_and_duplicates(actions: List[dict]) -> Tuple[int,int]:
-    dup_count = 0
-    conf_count = 0
-
-    seen = set()
-    modes = set()
-
-    for a in actions:
-        name = (a.get("name") or a.get("action") or "").lower()
-        target = a.get("target") or a.get("target_id") or ""
-        params = a.get("params") or {}
-        key = (name, str(target), json.dumps(params, sort_keys=True))
-
-        if key in seen:
-            dup_count += 1
-        else:
-            seen.add(key)
-
-        if name == "switch_mode":
-            mode = (params or {}).get("mode", "").lower()
-            if mode:
-                modes.add(mode)
-
-    if len(modes) > 1:
-        conf_count += 1
-
-    return conf_count, dup_count
+def freeze(value):
+    """Hashable stand-in for a JSON value, two values freeze equal when their sorted json.dumps forms are equal."""
+    if isinstance(value, dict):
+        return frozenset((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    # Tagged with the type so 1, 1.0 and True stay distinct, as they are in JSON text
+    return (type(value), value)
 
 # ========== HELPERS ==========
-def get_nested(d: dict, paths: List[List[str]]):
-    for p in paths:
-        cur = d
-        ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False
-                break
-            cur = cur[k]
-        if ok:
-            return cur
-    return None
-
+@lru_cache(maxsize=64)
 def norm_profile(pid: str) -> str:
-    if not pid:
-        return "UNK"
-    pid_low = pid.lower()
-    for alias, canon in PROFILE_ALIASES.items():
-        if alias == pid_low:
-            return canon
-    # if looks like P#, keep it
-    if re.fullmatch(r"p[0-9]", pid_low):
-        return pid_low.upper()
-    return pid
+    # Unknown ids are kept as they are
+    return PROFILE_CANON.get(pid.lower(), pid or "UNK")
 
 def norm_event_type(t: str) -> str:
     if not t:
@@ -177,21 +146,20 @@ def extract_latency_s(data) -> float:
 def acceptable_for_event(event_type: str) -> set:
     return ACCEPTABLE.get(event_type, set())
 
-def action_key_for_accept(a: dict, event_type: str) -> str:
-    name = (a.get("name") or a.get("action") or "").lower()
-    if name == "switch_mode":
-        mode = (a.get("params") or {}).get("mode", "").lower()
-        if mode in {"voice", "gesture"}:
-            return f"switch_mode:{mode}"
-    return name
-
 # ========== MAIN COMPUTATION ==========
-def compute_metrics(log_dir: str, paa_topk: int = 0):
-    files = []
-    for root, _, fnames in os.walk(log_dir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root, f))
+def parse_log_file(path: str) -> List[Tuple[str, str, List[dict]]]:
+    """(profile, event_type, actions) for every record of one log file."""
+    records = []
+    for data in read_jsonl(path):
+        profile = get_nested(data, KEYS["profile"])
+        profile = norm_profile(profile) if isinstance(profile, str) else str(profile or "UNK")
+        event_type = get_nested(data, KEYS["event_type"])
+        event_type = norm_event_type(event_type if isinstance(event_type, str) else "")
+        records.append((profile, event_type, extract_actions(data)))
+    return records
+
+def compute_metrics(log_dir: str, paa_topk: int = 0, jobs: int = 1):
+    files = discover_jsonl(log_dir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {log_dir}")
 
@@ -215,153 +183,129 @@ def compute_metrics(log_dir: str, paa_topk: int = 0):
     global_action_total = 0
     global_action_accessible = 0
 
-    for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-
-                profile = get_nested(data, KEYS["profile"])
-                profile = norm_profile(profile) if isinstance(profile, str) else str(profile or "UNK")
-                event_type = get_nested(data, KEYS["event_type"])
-                event_type = norm_event_type(event_type if isinstance(event_type, str) else "")
-
-                actions = extract_actions(data)
-                latency_s = extract_latency_s(data)
-
-                # For reporting denominators
-                per_profile_total_events[profile] += 1
-                is_error = event_type in {"miss_tap", "slider_miss"}
+    # (profile, [(action name, category), ...]) per response, kept for the top-K PAA pass
+    paa_records = []
+
+    # Parsing can run in worker processes, the accumulation below always sees the records in file order
+    for records in map_log_files(parse_log_file, files, jobs):
+        for profile, event_type, actions in records:
+            # For reporting denominators
+            per_profile_total_events[profile] += 1
+            needs = PROFILE_NEEDS_SETS.get(profile, NO_NEEDS)
+            handsfree_event = event_type in {"voice", "gesture"}
+
+            # ERA only for error/modality events that have acceptable actions
+            acc = None
+            if event_type in {"miss_tap", "slider_miss"} or handsfree_event:
+                acc = acceptable_for_event(event_type)
+                if acc:
+                    per_profile_error_events[profile] += 1
+
+            # One pass over the actions feeds PAA, ERA, MEH and DCI, tallied in locals
+            # and added to the per-profile counters once per record
+            named_actions = []
+            accessible = paa_hits = 0
+            motor = visual = era_hit = meh_hit = False
+            seen = set()
+            modes = set()
+            dup = 0
+            for a in actions:
+                name = (a.get("name") or a.get("action") or "").lower()
+                params = a.get("params") or {}
+                is_switch = name == "switch_mode"
+                # Mode as read by the ERA accept key and the DCI conflict rule
+                mode = params.get("mode", "").lower() if is_switch else ""
 
                 # ----- PAA + category counts -----
-                needs = set(PROFILE_NEEDS.get(profile, []))
-                for a in actions:
-                    name = (a.get("name") or a.get("action") or "").lower()
-                    params = a.get("params") or {}
-                    cat = action_to_category(name, params)
-
-                    per_profile_actions[profile] += 1
-                    global_action_total += 1
-                    if cat in {"motor", "visual", "handsfree"}:
-                        per_profile_accessible_actions[profile] += 1
-                        global_action_accessible += 1
-
-                        per_profile_paa_total[profile] += 1
-                        if cat in needs and needs:
-                            per_profile_paa_hits[profile] += 1
-
-                        # WCAG policy coverage flags
-                        if cat == "motor":
-                            wcag_flags[profile]["2.5.5"] = True   # Target Size
-                        elif cat == "visual":
-                            # We can't distinguish contrast vs font here reliably; mark both as addressed.
-                            wcag_flags[profile]["1.4.3"] = True   # Contrast
-                            wcag_flags[profile]["1.4.4"] = True   # Resize text
-                        elif cat == "handsfree":
-                            # no direct WCAG mapping we assert here
-                            pass
+                cat = action_to_category(name, params)
+                named_actions.append((name, cat))
+                if cat in {"motor", "visual", "handsfree"}:
+                    accessible += 1
+                    if needs and cat in needs:
+                        paa_hits += 1
+                    if cat == "motor":
+                        motor = True
+                    elif cat == "visual":
+                        visual = True
 
                 # ----- ERA -----
-                if is_error or event_type in {"voice", "gesture"}:
-                    acc = acceptable_for_event(event_type)
-                    if acc:
-                        per_profile_error_events[profile] += 1
-                        hit = False
-                        for a in actions:
-                            key = action_key_for_accept(a, event_type)
-                            if key in acc:
-                                hit = True
-                                break
-                        if hit:
-                            per_profile_era_hits[profile] += 1
+                if acc and not era_hit:
+                    key = f"switch_mode:{mode}" if mode in {"voice", "gesture"} else name
+                    era_hit = key in acc
 
                 # ----- MEH (only meaningful for handsfree profiles) -----
-                meh_hit = False
-                for a in actions:
-                    name = (a.get("name") or a.get("action") or "").lower()
-                    params = a.get("params") or {}
-                    if name == "switch_mode":
-                        mode = (params.get("mode") or params.get("to") or params.get("modality") or "").lower()
-                        if mode in {"voice","gesture"} or event_type in {"voice","gesture"}:
-                            meh_hit = True
-                    if name == "trigger_button" and event_type == "voice":
+                if is_switch:
+                    meh_mode = (params.get("mode") or params.get("to") or params.get("modality") or "").lower()
+                    if meh_mode in {"voice","gesture"} or handsfree_event:
                         meh_hit = True
-                if meh_hit:
-                    per_profile_meh_hits[profile] += 1
-
-                # ----- DCI -----
-                conf, dup = compute_conflicts_and_duplicates(actions)
-                sugg = max(1, len(actions))  # avoid div0; single suggestion with 1 conflict still penalises
-                dci = 1.0 - float(conf + dup) / float(sugg)
-                dci = max(0.0, min(1.0, dci))
-                per_profile_dci_sum[profile] += dci
-                per_profile_dci_n[profile] += 1
+                if name == "trigger_button" and event_type == "voice":
+                    meh_hit = True
+
+                # ----- DCI (see CONFLICT RULES FOR DCI) -----
+                target = a.get("target") or a.get("target_id") or ""
+                key = (name, str(target), freeze(params) if params else ())
+                if key in seen:
+                    dup += 1
+                else:
+                    seen.add(key)
+                if mode:
+                    modes.add(mode)
+
+            if actions:
+                per_profile_actions[profile] += len(actions)
+                global_action_total += len(actions)
+            if accessible:
+                per_profile_accessible_actions[profile] += accessible
+                global_action_accessible += accessible
+                per_profile_paa_total[profile] += accessible
+                per_profile_paa_hits[profile] += paa_hits
+            # WCAG policy coverage flags
+            if motor:
+                wcag_flags[profile]["2.5.5"] = True   # Target Size
+            if visual:
+                # We can't distinguish contrast vs font here reliably; mark both as addressed.
+                wcag_flags[profile]["1.4.3"] = True   # Contrast
+                wcag_flags[profile]["1.4.4"] = True   # Resize text
+            if paa_topk and paa_topk > 0:
+                paa_records.append((profile, named_actions))
+            if era_hit:
+                per_profile_era_hits[profile] += 1
+            if meh_hit:
+                per_profile_meh_hits[profile] += 1
+
+            conf = 1 if len(modes) > 1 else 0
+            sugg = max(1, len(actions))  # avoid div0; single suggestion with 1 conflict still penalises
+            dci = 1.0 - float(conf + dup) / float(sugg)
+            dci = max(0.0, min(1.0, dci))
+            per_profile_dci_sum[profile] += dci
+            per_profile_dci_n[profile] += 1
 
 
     # ----- Optional: restrict PAA to top-K actions per profile -----
     # If paa_topk > 0, we recompute PAA numerator/denominator using only the top-K most frequent actions per profile.
+    # Both steps run over the records collected in the main pass, the logs are read and parsed only once.
     if paa_topk and paa_topk > 0:
         # First, compute per-profile frequency of actions by name
         freq_by_prof = defaultdict(Counter)
-        # We need to recompute by scanning log files again to record action frequencies.
-        files2 = []
-        for root, _, fnames in os.walk(log_dir):
-            for f in fnames:
-                if f.lower().endswith(".jsonl"):
-                    files2.append(os.path.join(root, f))
-        for path in files2:
-            with open(path, "r", encoding="utf-8") as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except Exception:
-                        continue
-                    profile = get_nested(data, KEYS["profile"])
-                    profile = norm_profile(profile) if isinstance(profile, str) else str(profile or "UNK")
-                    actions = extract_actions(data)
-                    for a in actions:
-                        name = (a.get("name") or a.get("action") or "").lower()
-                        freq_by_prof[profile][name] += 1
+        for profile, named_actions in paa_records:
+            freq_by_prof[profile].update(name for name, _ in named_actions)
 
         # Determine top-K action names per profile
         topk_names = {}
         for p, counter in freq_by_prof.items():
             topk_names[p] = {name for name, _ in counter.most_common(paa_topk)}
 
-        # Reset PAA accumulators and rescan using only top-K
+        # Reset PAA accumulators and recount using only top-K
         per_profile_paa_hits.clear()
         per_profile_paa_total.clear()
-        for path in files2:
-            with open(path, "r", encoding="utf-8") as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except Exception:
-                        continue
-                    profile = get_nested(data, KEYS["profile"])
-                    profile = norm_profile(profile) if isinstance(profile, str) else str(profile or "UNK")
-                    actions = extract_actions(data)
-                    needs = set(PROFILE_NEEDS.get(profile, []))
-                    allowed_names = topk_names.get(profile, set())
-                    for a in actions:
-                        name = (a.get("name") or a.get("action") or "").lower()
-                        params = a.get("params") or {}
-                        cat = action_to_category(name, params)
-                        if name in allowed_names and cat in {"motor","visual","handsfree"}:
-                            per_profile_paa_total[profile] += 1
-                            if cat in needs and needs:
-                                per_profile_paa_hits[profile] += 1
+        for profile, named_actions in paa_records:
+            needs = PROFILE_NEEDS_SETS.get(profile, NO_NEEDS)
+            allowed_names = topk_names.get(profile, set())
+            for name, cat in named_actions:
+                if name in allowed_names and cat in {"motor","visual","handsfree"}:
+                    per_profile_paa_total[profile] += 1
+                    if needs and cat in needs:
+                        per_profile_paa_hits[profile] += 1
 
     # ----- Aggregate results -----
     rows = []
@@ -421,9 +365,10 @@ def main():
     ap.add_argument("--paa-topk", type=int, default=0, help="Restrict PAA to top-K most frequent actions per profile (0 = all)")
     ap.add_argument("--summary-csv", default="metrics_summary.csv")
     ap.add_argument("--by-profile-csv", default="metrics_by_profile.csv")
+    ap.add_argument("--jobs", type=int, default=1, help="Parse log files in N worker processes (default 1 = in-process)")
     args = ap.parse_args()
 
-    rows, globals_agg = compute_metrics(args.logdir, paa_topk=args.paa_topk)
+    rows, globals_agg = compute_metrics(args.logdir, paa_topk=args.paa_topk, jobs=args.jobs)
     write_csv(rows, globals_agg, args.summary_csv, args.by_profile_csv)
 
     print("Done. Wrote:")
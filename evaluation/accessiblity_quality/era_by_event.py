@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-import os, sys, json, math, argparse
+import sys, math, argparse
 from collections import defaultdict
+from functools import lru_cache
 from typing import List, Tuple
+from jsonl_files import discover_jsonl, get_nested, map_log_files, read_jsonl
 
 EVENT_ALIAS = {
     "tap_miss": "miss_tap",
@@ -10,6 +12,8 @@ EVENT_ALIAS = {
     "speech": "voice",
 }
 
+# Memoised, the logs repeat a handful of raw event type strings
+@lru_cache(maxsize=64)
 def norm_event_type(t: str) -> str:
     if not t:
         return "UNK"
@@ -32,6 +36,10 @@ ACCEPTABLE = {
     "gesture": {"switch_mode:gesture", "trigger_button"},
 }
 
+# Reported event types in row order, EV_IDX maps each to its slot in the per-file tallies
+EVENTS = ("miss_tap", "slider_miss", "voice", "gesture")
+EV_IDX = {ev: i for i, ev in enumerate(EVENTS)}
+
 NOTES = {
     "miss_tap": "motor fixes prevalent",
     "slider_miss": "slider size/spacing",
@@ -48,19 +56,6 @@ KEYS = {
     ],
 }
 
-def get_nested(d: dict, paths: List[List[str]]):
-    for p in paths:
-        cur = d
-        ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False
-                break
-            cur = cur[k]
-        if ok:
-            return cur
-    return None
-
 def extract_actions(data: dict):
     raw = get_nested(data, KEYS["actions"])
     if raw is None:
@@ -102,48 +97,37 @@ def wilson_ci(k: int, n: int, z: float = 1.96):
     lo, hi = center - half, center + half
     return (max(0.0, lo), min(1.0, hi))
 
-def compute_era_by_event(logdir: str):
-    files = []
-    for root, _, fnames in os.walk(logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root, f))
+def parse_log_file(path: str) -> Tuple[List[int], List[int]]:
+    """Event counts and acceptable-action hits of one log file, indexed like EVENTS"""
+    counts = [0] * len(EVENTS)
+    hits = [0] * len(EVENTS)
+    for data in read_jsonl(path):
+        ev = get_nested(data, KEYS["event_type"])
+        ev = norm_event_type(ev if isinstance(ev, str) else "")
+        idx = EV_IDX.get(ev, -1)
+        if idx < 0:
+            continue
+        counts[idx] += 1
+        acc = ACCEPTABLE[ev]
+        for a in extract_actions(data):
+            if action_key_for_accept(a, ev) in acc:
+                hits[idx] += 1
+                break
+    return counts, hits
+
+def compute_era_by_event(logdir: str, jobs: int = 1):
+    files = discover_jsonl(logdir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {logdir}")
 
-    counts = {k: 0 for k in ["miss_tap", "slider_miss", "voice", "gesture"]}
-    hits   = {k: 0 for k in ["miss_tap", "slider_miss", "voice", "gesture"]}
-
-    for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-                ev = get_nested(data, KEYS["event_type"])
-                ev = norm_event_type(ev if isinstance(ev, str) else "")
-                if ev not in counts:
-                    continue
-                counts[ev] += 1
-                actions = extract_actions(data)
-                acc = ACCEPTABLE.get(ev, set())
-                ok = False
-                for a in actions:
-                    key = action_key_for_accept(a, ev)
-                    if key in acc:
-                        ok = True
-                        break
-                if ok:
-                    hits[ev] += 1
+    counts = [0] * len(EVENTS)
+    hits = [0] * len(EVENTS)
+    for file_counts, file_hits in map_log_files(parse_log_file, files, jobs):
+        counts = [c + fc for c, fc in zip(counts, file_counts)]
+        hits = [h + fh for h, fh in zip(hits, file_hits)]
 
     rows = []
-    for ev in ["miss_tap", "slider_miss", "voice", "gesture"]:
-        n = counts[ev]
-        k = hits[ev]
+    for ev, n, k in zip(EVENTS, counts, hits):
         era = (k / n * 100.0) if n else float("nan")
         lo, hi = wilson_ci(k, n)
         ci_str = "--" if n == 0 else f"[{lo*100:.2f}, {hi*100:.2f}]"
@@ -162,9 +146,10 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("logdir", help="Directory with .jsonl logs (scanned recursively)")
     ap.add_argument("--csv", default="era_by_event.csv", help="Output CSV path")
+    ap.add_argument("--jobs", type=int, default=1, help="Parse log files in N worker processes (default 1 = in-process)")
     args = ap.parse_args()
 
-    rows = compute_era_by_event(args.logdir)
+    rows = compute_era_by_event(args.logdir, jobs=args.jobs)
     write_csv(rows, args.csv)
 
     print("ERA by event type:")
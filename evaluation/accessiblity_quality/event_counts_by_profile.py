@@ -1,22 +1,13 @@
 #!/usr/bin/env python3
-import os, re, json, argparse, csv
+import os, re, argparse, csv
 from collections import defaultdict, Counter
+from jsonl_files import discover_jsonl, get_nested, map_log_files, read_jsonl
 
 KEYS = {
     "profile": [["profile_id"], ["profile"], ["user_profile"], ["user","profile"], ["p"]],
     "event_type": [["event","event_type"], ["event","type"], ["event_type"], ["type"], ["evt_type"]],
 }
 
-def get_nested(d, paths):
-    for p in paths:
-        cur = d; ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False; break
-            cur = cur[k]
-        if ok: return cur
-    return None
-
 def norm_profile(pid, fname):
     if isinstance(pid, str) and pid.strip():
         m = re.fullmatch(r"[pP](\d+)", pid.strip())
@@ -35,34 +26,32 @@ def norm_event_type(t):
     if "gesture" in s or "point" in s: return "gesture"
     return s
 
+# Per-profile event counts of one log file, merged across files in main
+def count_log_file(path):
+    counts = defaultdict(Counter)
+    fname = os.path.basename(path)
+    for data in read_jsonl(path):
+        p = norm_profile(get_nested(data, KEYS["profile"]), fname)
+        ev = norm_event_type(get_nested(data, KEYS["event_type"]))
+        counts[p][ev] += 1
+        counts[p]["ALL"] += 1
+    return counts
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("logdir")
     ap.add_argument("--csv", default="event_counts_by_profile.csv")
+    ap.add_argument("--jobs", type=int, default=1, help="Count log files in N worker processes (default 1 = in-process)")
     args = ap.parse_args()
 
-    files = []
-    for root,_,fnames in os.walk(args.logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root,f))
+    files = discover_jsonl(args.logdir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {args.logdir}")
 
     counts = defaultdict(Counter)
-    for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line=line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-                p = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
-                ev = norm_event_type(get_nested(data, KEYS["event_type"]))
-                counts[p][ev] += 1
-                counts[p]["ALL"] += 1
+    for file_counts in map_log_files(count_log_file, files, args.jobs):
+        for p, c in file_counts.items():
+            counts[p].update(c)
 
     with open(args.csv, "w", newline="", encoding="utf-8") as fh:
         w = csv.writer(fh)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import json, os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# orjson parses the JSONL lines straight from bytes, the stdlib parser is the fallback when it's not installed.
+# orjson rejects the NaN/Infinity tokens that json.dumps writes by default (evaluation.py logs), such lines
+# are handed to the stdlib parser instead of being dropped
+try:
+    import orjson
+
+    def loads(line: bytes) -> Any:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return json.loads(line)
+except ImportError:
+    loads = json.loads
+
+READ_BUFFER_BYTES = 1 << 20
+BLANK_LINES = {b"\n", b"\r\n"}
+
+# Shared .jsonl discovery for the metric scripts. Walks the tree with os.scandir in the same
+# top-down order as os.walk (files of a directory first, then its subdirectories, symlinked
+# directories are not followed), so the scripts see the files in the same order as before.
+@lru_cache(maxsize=None)
+def discover_jsonl(logdir: str) -> Tuple[str, ...]:
+    files = []
+    stack = [logdir]
+    while stack:
+        top = stack.pop()
+        try:
+            with os.scandir(top) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.lower().endswith(".jsonl"):
+                files.append(entry.path)
+        # Reversed onto the stack so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+    return tuple(files)
+
+# Parsed records of one .jsonl file, read as raw bytes through a 1 MiB buffer.
+# Blank lines are skipped without parsing, malformed lines are skipped after a failed parse.
+def read_jsonl(path: str) -> Iterator[Any]:
+    with open(path, "rb", buffering=READ_BUFFER_BYTES) as fh:
+        for line in fh:
+            if line in BLANK_LINES:
+                continue
+            try:
+                data = loads(line)
+            except Exception:
+                continue
+            yield data
+
+# parse_file applied to every log file, results come back in file order so the callers aggregate
+# exactly as in a serial scan. jobs > 1 parses the files in a process pool (parse_file must be a
+# module-level function so it can be pickled)
+def map_log_files(parse_file: Callable[[str], T], files: Sequence[str], jobs: int = 1) -> Iterator[T]:
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            yield from ex.map(parse_file, files)
+    else:
+        yield from map(parse_file, files)
+
+# Value at the first candidate key path present in d (paths in priority order), None when none matches.
+# Every path is tried in order on every record: remembering the last matching path would let a
+# lower-priority key win on records that carry several of the candidates
+def get_nested(d: dict, paths: Sequence[Sequence[str]]):
+    for p in paths:
+        cur = d
+        for k in p:
+            if not isinstance(cur, dict) or k not in cur:
+                break
+            cur = cur[k]
+        else:
+            return cur
+    return None
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-import os, re, json, math, argparse, csv
+import os, re, math, argparse, csv
 from collections import defaultdict, Counter
 from typing import List, Dict, Tuple, Optional
+from jsonl_files import discover_jsonl, get_nested, read_jsonl
 
 # --------- Configurable mappings ---------
 PROFILE_NEEDS: Dict[str, List[str]] = {
@@ -13,6 +14,10 @@ PROFILE_NEEDS: Dict[str, List[str]] = {
     "P5": ["visual","motor"],
 }
 
+# Frozen once at import, looked up per record instead of building a set per line
+PROFILE_NEEDS_SETS = {p: frozenset(needs) for p, needs in PROFILE_NEEDS.items()}
+NO_NEEDS = frozenset()
+
 MOTOR_ACTIONS = {"increase_button_size","increase_button_border","increase_slider_size","adjust_spacing"}
 VISUAL_ACTIONS = {"increase_font_size","increase_contrast"}
 # handsfree relies on params/event_type
@@ -31,19 +36,6 @@ KEYS = {
     ],
 }
 
-def get_nested(d: dict, paths: List[List[str]]):
-    for p in paths:
-        cur = d
-        ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False
-                break
-            cur = cur[k]
-        if ok:
-            return cur
-    return None
-
 def norm_profile(pid: Optional[str], filename: str) -> str:
     if isinstance(pid, str) and pid.strip():
         m = re.fullmatch(r"[pP](\d+)", pid.strip())
@@ -94,11 +86,7 @@ def action_to_category(name: str, params: dict, event_type: str) -> Optional[str
     return None
 
 def scan_logs(logdir: str):
-    files = []
-    for root, _, fnames in os.walk(logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root, f))
+    files = discover_jsonl(logdir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {logdir}")
     return files
@@ -106,20 +94,13 @@ def scan_logs(logdir: str):
 def compute_topk_by_profile(files: List[str], paa_topk: int) -> Dict[str, set]:
     freq = defaultdict(Counter)
     for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line=line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-                profile = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
-                acts = extract_actions(data)
-                for a in acts:
-                    n = (a.get("name") or a.get("action") or "").lower()
-                    if not n: continue
-                    freq[profile][n] += 1
+        for data in read_jsonl(path):
+            profile = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
+            acts = extract_actions(data)
+            for a in acts:
+                n = (a.get("name") or a.get("action") or "").lower()
+                if not n: continue
+                freq[profile][n] += 1
     topk = {}
     for p,c in freq.items():
         if paa_topk and paa_topk>0:
@@ -135,31 +116,24 @@ def compute_paa(files: List[str], paa_topk: int = 5) -> Tuple[Dict[str, float],
     per_profile_categories = defaultdict(list)
 
     for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line=line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
+        for data in read_jsonl(path):
+            prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
+            needs = PROFILE_NEEDS_SETS.get(prof, NO_NEEDS)
+            evtype = norm_event_type(get_nested(data, KEYS["event_type"]))
+            acts = extract_actions(data)
+            allowed = topk.get(prof, set())
+            for a in acts:
+                name = (a.get("name") or a.get("action") or "").lower()
+                cat = action_to_category(name, a.get("params") or {}, evtype)
+                if cat not in {"motor","visual","handsfree"}:
+                    continue
+                if paa_topk and name not in allowed:
                     continue
-                prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
-                needs = set(PROFILE_NEEDS.get(prof, []))
-                evtype = norm_event_type(get_nested(data, KEYS["event_type"]))
-                acts = extract_actions(data)
-                allowed = topk.get(prof, set())
-                for a in acts:
-                    name = (a.get("name") or a.get("action") or "").lower()
-                    cat = action_to_category(name, a.get("params") or {}, evtype)
-                    if cat not in {"motor","visual","handsfree"}:
-                        continue
-                    if paa_topk and name not in allowed:
-                        continue
-                    tot[prof] += 1
-                    if needs and cat in needs:
-                        hits[prof] += 1
-                    # store for swap rescoring
-                    per_profile_categories[prof].append(cat)
+                tot[prof] += 1
+                if needs and cat in needs:
+                    hits[prof] += 1
+                # store for swap rescoring
+                per_profile_categories[prof].append(cat)
 
     orig_paa = {}
     for p in tot:
@@ -179,7 +153,7 @@ def compute_paa(files: List[str], paa_topk: int = 5) -> Tuple[Dict[str, float],
         vals = []
         for q in profs:
             if q == p: continue
-            needs_q = set(PROFILE_NEEDS.get(q, []))
+            needs_q = PROFILE_NEEDS_SETS.get(q, NO_NEEDS)
             if not needs_q:
                 continue
             hit = sum(1 for c in cats if c in needs_q)
@@ -213,13 +187,7 @@ def main():
     args = ap.parse_args()
 
     # scan files
-    files = []
-    for root,_,fnames in os.walk(args.logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root,f))
-    if not files:
-        raise SystemExit(f"No .jsonl files found under: {args.logdir}")
+    files = scan_logs(args.logdir)
 
     orig, swap = compute_paa(files, paa_topk=args.paa_topk)
     write_outputs(orig, swap, args.csv)
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, re, json, math, argparse, csv
+import os, re, math, argparse, csv
 from collections import defaultdict, Counter
 from typing import List, Dict, Tuple, Optional, Set
+from jsonl_files import discover_jsonl, get_nested, read_jsonl
 
 # --------- Profile -> needs ---------
 PROFILE_NEEDS: Dict[str, List[str]] = {
@@ -15,6 +16,10 @@ PROFILE_NEEDS: Dict[str, List[str]] = {
     "P5": ["visual","motor"],
 }
 
+# Frozen once at import, looked up per record instead of building a set per line
+PROFILE_NEEDS_SETS = {p: frozenset(needs) for p, needs in PROFILE_NEEDS.items()}
+NO_NEEDS = frozenset()
+
 # --------- Acceptable corrective sets per event ---------
 ACCEPTABLE = {
     "miss_tap": {"increase_button_size", "increase_button_border", "adjust_spacing", "switch_mode:voice"},
@@ -40,19 +45,6 @@ KEYS = {
     ],
 }
 
-def get_nested(d: dict, paths: List[List[str]]):
-    for p in paths:
-        cur = d
-        ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False
-                break
-            cur = cur[k]
-        if ok:
-            return cur
-    return None
-
 def norm_profile(pid: Optional[str], filename: str) -> str:
     if isinstance(pid, str) and pid.strip():
         m = re.fullmatch(r"[pP](\d+)", pid.strip())
@@ -129,28 +121,17 @@ def action_to_category(name: str, params: dict, event_type: str):
     return None
 
 def compute(logdir: str, variant: str = "minimal", paa_topk: int = 5):
-    files = []
-    for root,_,fnames in os.walk(logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root,f))
+    files = discover_jsonl(logdir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {logdir}")
 
     freq = defaultdict(Counter)
     for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line=line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-                prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
-                for a in extract_actions(data):
-                    n = (a.get("name") or a.get("action") or "").lower()
-                    if n: freq[prof][n] += 1
+        for data in read_jsonl(path):
+            prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
+            for a in extract_actions(data):
+                n = (a.get("name") or a.get("action") or "").lower()
+                if n: freq[prof][n] += 1
     topk = {}
     for p,c in freq.items():
         if paa_topk and paa_topk>0:
@@ -163,42 +144,35 @@ def compute(logdir: str, variant: str = "minimal", paa_topk: int = 5):
     overall = {"jacc": [], "exact": 0, "n": 0}
 
     for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line=line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
+        for data in read_jsonl(path):
+            prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
+            evtype = norm_event_type(get_nested(data, KEYS["event_type"]))
+            acts = extract_actions(data)
+            llm_set = { (a.get("name") or a.get("action") or "").lower() for a in acts if (a.get("name") or a.get("action")) }
+            rule_set = set(rule_actions(evtype, variant=variant))
+
+            j = jaccard(llm_set, rule_set)
+            ex = 1 if llm_set == rule_set else 0
+
+            per_prof[prof]["jacc"].append(j)
+            per_prof[prof]["exact"] += ex
+            per_prof[prof]["n"] += 1
+            overall["jacc"].append(j)
+            overall["exact"] += ex
+            overall["n"] += 1
+
+            needs = PROFILE_NEEDS_SETS.get(prof, NO_NEEDS)
+            allowed = topk.get(prof, set())
+            for name in rule_set:
+                params = {}
+                cat = action_to_category(name, params, evtype)
+                if cat not in {"motor","visual","handsfree"}:
+                    continue
+                if paa_topk and name not in allowed:
                     continue
-                prof = norm_profile(get_nested(data, KEYS["profile"]), os.path.basename(path))
-                evtype = norm_event_type(get_nested(data, KEYS["event_type"]))
-                acts = extract_actions(data)
-                llm_set = { (a.get("name") or a.get("action") or "").lower() for a in acts if (a.get("name") or a.get("action")) }
-                rule_set = set(rule_actions(evtype, variant=variant))
-
-                j = jaccard(llm_set, rule_set)
-                ex = 1 if llm_set == rule_set else 0
-
-                per_prof[prof]["jacc"].append(j)
-                per_prof[prof]["exact"] += ex
-                per_prof[prof]["n"] += 1
-                overall["jacc"].append(j)
-                overall["exact"] += ex
-                overall["n"] += 1
-
-                needs = set(PROFILE_NEEDS.get(prof, []))
-                allowed = topk.get(prof, set())
-                for name in rule_set:
-                    params = {}
-                    cat = action_to_category(name, params, evtype)
-                    if cat not in {"motor","visual","handsfree"}:
-                        continue
-                    if paa_topk and name not in allowed:
-                        continue
-                    per_prof[prof]["paa_tot"] += 1
-                    if needs and cat in needs:
-                        per_prof[prof]["paa_hits"] += 1
+                per_prof[prof]["paa_tot"] += 1
+                if needs and cat in needs:
+                    per_prof[prof]["paa_hits"] += 1
 
     prof_rows = []
     for p in sorted(per_prof.keys()):
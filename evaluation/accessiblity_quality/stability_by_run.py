@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-import os, re, json, math, csv, argparse
+import re, math, csv, argparse
 from pathlib import Path
 from typing import List, Dict, Tuple
+from jsonl_files import discover_jsonl, get_nested, read_jsonl
 
 # -------- Robust key paths --------
 KEYS = {
@@ -22,19 +23,6 @@ KEYS = {
     ]
 }
 
-def get_nested(d: dict, paths: List[List[str]]):
-    for p in paths:
-        cur = d
-        ok = True
-        for k in p:
-            if not isinstance(cur, dict) or k not in cur:
-                ok = False
-                break
-            cur = cur[k]
-        if ok:
-            return cur
-    return None
-
 def norm_profile(pid: str, filename: str) -> str:
     if isinstance(pid, str) and pid.strip():
         # Canonicalize "p2" -> "P2"
@@ -72,11 +60,7 @@ def jaccard(set_a: set, set_b: set) -> float:
 
 def compute_stability(logdir: str, events_per_run: int = 7) -> Tuple[Dict[str, List[float]], List[int]]:
     # Gather files
-    files = []
-    for root, _, fnames in os.walk(logdir):
-        for f in fnames:
-            if f.lower().endswith(".jsonl"):
-                files.append(os.path.join(root, f))
+    files = discover_jsonl(logdir)
     if not files:
         raise SystemExit(f"No .jsonl files found under: {logdir}")
 
@@ -84,38 +68,31 @@ def compute_stability(logdir: str, events_per_run: int = 7) -> Tuple[Dict[str, L
     per_prof = {}
 
     for path in files:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    continue
-                profile = get_nested(data, KEYS["profile"])
-                profile = norm_profile(profile if isinstance(profile, str) else "", Path(path).name)
-
-                # Event index per run
-                ev_idx = get_nested(data, KEYS["event_index"])
-                if isinstance(ev_idx, str):
-                    try: ev_idx = int(ev_idx)
-                    except: ev_idx = None
-                if not isinstance(ev_idx, int):
-                    ev_idx = None  # will infer via position later
-
-                # Run index
-                run_idx = get_nested(data, KEYS["run_index"])
-                if isinstance(run_idx, str):
-                    try: run_idx = int(run_idx)
-                    except: run_idx = None
-                if not isinstance(run_idx, int):
-                    run_idx = None  # will infer via position later
-
-                # Initialize structures
-                per_prof.setdefault(profile, {"rows": [], "bypos": {}})
-                per_prof[profile]["rows"].append({
-                    "run": run_idx, "ev": ev_idx, "file": path, "data": data
-                })
+        for data in read_jsonl(path):
+            profile = get_nested(data, KEYS["profile"])
+            profile = norm_profile(profile if isinstance(profile, str) else "", Path(path).name)
+
+            # Event index per run
+            ev_idx = get_nested(data, KEYS["event_index"])
+            if isinstance(ev_idx, str):
+                try: ev_idx = int(ev_idx)
+                except: ev_idx = None
+            if not isinstance(ev_idx, int):
+                ev_idx = None  # will infer via position later
+
+            # Run index
+            run_idx = get_nested(data, KEYS["run_index"])
+            if isinstance(run_idx, str):
+                try: run_idx = int(run_idx)
+                except: run_idx = None
+            if not isinstance(run_idx, int):
+                run_idx = None  # will infer via position later
+
+            # Initialize structures
+            per_prof.setdefault(profile, {"rows": [], "bypos": {}})
+            per_prof[profile]["rows"].append({
+                "run": run_idx, "ev": ev_idx, "file": path, "data": data
+            })
 
     # Infer run/ev positions if missing: assume chronological order, split by events_per_run
     for p, bundle in per_prof.items():
@@ -60,9 +60,13 @@ PROFILES = [
   {"user_id":"P5","accessibility_needs":{"visual_impaired":True,"motor_impaired":True},"input_preferences":{"preferred_modality":"voice"},"ui_preferences":{"font_size":18,"contrast_mode":"normal","button_size":1.2}},
 ]
 
+# --- UTC ISO timestamps with a Z suffix (timezone-aware, utcnow is deprecated) ---
+def utc_iso():
+  return dt.datetime.now(dt.timezone.utc).isoformat().replace("+00:00", "Z")
+
 # --- Deterministic event script (repeat per profile) ---
 def event_script(user_id):
-  iso = lambda: dt.datetime.utcnow().isoformat() + "Z"
+  iso = utc_iso
   return [
     {"event_type":"miss_tap","source":"touch","timestamp":iso(),"user_id":user_id,"target_element":"lamp","coordinates":{"x":101,"y":203}, "metadata":{"UI_element": "button"}},
     {"event_type":"voice","source":"voice","target_element":"lamp","timestamp":iso(),"user_id":user_id,"confidence":0.9,"metadata":{"command":"turn_on", "UI_element": "button"}},
@@ -119,11 +123,11 @@ def run_profile(p, runs=2, jsonl_path="feasibility_log.jsonl"):
       for r in range(1, runs+1):
           for idx, ev in enumerate(event_script(p["user_id"]), start=1):
             send_ts = time.perf_counter()
-            send_iso = dt.datetime.utcnow().isoformat()+"Z"
+            send_iso = utc_iso()
             ws.send(json.dumps(ev))
             raw = ws.recv()
             recv_ts = time.perf_counter()
-            recv_iso = dt.datetime.utcnow().isoformat()+"Z"
+            recv_iso = utc_iso()
             latency_ms = round((recv_ts - send_ts)*1000, 2)
 
             try: